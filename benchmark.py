@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 12:17:23 2026
+
+@author: James
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date,datetime
+from connectionManager import get_database_name,set_database_name
+from syntheticData import PLATFORMS,SyntheticDataSettings,customer_id,generate_files
+
+"""
+This module times the hot paths of the rental company software on synthetic data from syntheticData.py,
+so a change can be checked for speed against the results of the last run.
+Each run writes the text files into a temporary directory, loads them into a new database there
+and times these scenarios:
+   - ingest, database.py loading the games and rental files into the database,
+   - search, get_available_games_info for titles picked by popularity,
+   - subscription_load, the first rental of a session reading the subscription file,
+   - rent, can_customer_rent_another_game for random customers and copies,
+   - return, returning_game for the copies rented and for random game ids,
+   - games_to_buy, for every month, first with the query cache emptied and then again from the cache.
+The results are saved as json, with the timings of each scenario, the settings of the data and the
+versions of python and SQLite, for example:
+    python benchmark.py --preset small --output results.json
+The large preset, 10000 titles, a million customers and fifty million rentals, takes hours to run
+and needs tens of gigabytes of disk space.
+"""
+
+PRESETS={
+    "sample":{"titles":20,"customers":80,"rentals":1000},
+    "small":{"titles":500,"customers":10000,"rentals":100000},
+    "medium":{"titles":2000,"customers":100000,"rentals":2000000},
+    "large":{"titles":10000,"customers":1000000,"rentals":50000000},
+}
+
+MONTHS=("January","February","March","April","May","June","July","August","September","October","November","December")
+
+def summarise_timings(timings):
+    """
+    This summarises the times of the calls of one scenario.
+    It takes a list of times in seconds and returns a dictionary of the number of calls, the total time and the mean, median,
+    95th percentile and slowest call in milliseconds.
+    """
+    timings=sorted(timings)
+
+    def percentile(share):
+
+        return(round(timings[min(len(timings)-1,int(share*len(timings)))]*1000,4))
+
+    return({
+        "calls":len(timings),
+        "total_seconds":round(sum(timings),4),
+        "mean_ms":round(sum(timings)*1000/len(timings),4),
+        "p50_ms":percentile(0.5),
+        "p95_ms":percentile(0.95),
+        "max_ms":round(timings[-1]*1000,4),
+    })
+
+def time_calls(function,argument_list):
+    """
+    This calls a function once for each tuple of arguments in a list, timing every call.
+    It returns a tuple of the list of results and the summary of the timings.
+    """
+    results=[]
+
+    timings=[]
+
+    for arguments in argument_list:
+
+        started=time.perf_counter()
+
+        results.append(function(*arguments))
+
+        timings.append(time.perf_counter()-started)
+
+    return(results,summarise_timings(timings))
+
+def count_outcomes(messages,outcomes):
+    """
+    This counts the messages containing each piece of text in a dictionary of outcome names,
+    so the results show how many calls took each path. Messages matching none are counted as 'other'.
+    """
+    counts={outcome:0 for outcome in outcomes}
+
+    counts["other"]=0
+
+    for message in messages:
+
+        matched=[outcome for outcome,text in outcomes.items() if text in str(message)]
+
+        counts[matched[0] if matched else "other"]+=1
+
+    return(counts)
+
+def popular_pick(random_numbers,items):
+    """
+    This picks an item from a list in popularity order, favouring the first ones as the rentals do.
+    """
+    return(items[min(len(items)-1,int(random_numbers.paretovariate(1.1))-1)])
+
+def run_benchmark(settings,calls=200,directory=None,keep_files=False):
+    """
+    This generates a synthetic data set, loads it and times every scenario.
+    It takes the SyntheticDataSettings, the number of calls timed for each of the search, rent and
+    return scenarios, and optionally the directory to work in, a new temporary directory by default,
+    which is deleted afterwards unless keep_files is True.
+    It returns the results as a dictionary.
+    """
+    working_directory=directory or tempfile.mkdtemp(prefix="rental-benchmark-")
+
+    previous_directory=os.getcwd()
+
+    previous_database_name=get_database_name()
+
+    results={
+        "created":datetime.now().isoformat(timespec="seconds"),
+        "python":platform.python_version(),
+        "sqlite":sqlite3.sqlite_version,
+        "platform":platform.platform(),
+        "settings":settings.as_dict(),
+        #The rent scenario checks the subscriptions against today, so they are generated around today.
+        "subscription_date":date.today().isoformat(),
+        "scenarios":{},
+    }
+
+    scenarios=results["scenarios"]
+
+    random_numbers=random.Random(settings.seed)
+
+    try:
+
+        started=time.perf_counter()
+
+        generated=generate_files(working_directory,settings)
+
+        results["generate_seconds"]=round(time.perf_counter()-started,4)
+
+        results["file_bytes"]={name:os.path.getsize(file_name) for name,file_name in generated["files"].items()}
+
+        #The rent and return functions read the subscription file from the working directory.
+        os.chdir(working_directory)
+
+        set_database_name(os.path.join(working_directory,"RentalCompany.db"))
+
+        import database
+        from gameSearch import get_available_games_info
+        from gameRent import can_customer_rent_another_game
+        from gameReturn import returning_game
+        from gameSelect import games_to_buy
+        from queryCache import query_cache
+        from subscriptionStore import get_subscriptions
+
+        started=time.perf_counter()
+
+        rental_progress,game_progress=database.initialise_database(generated["files"]["rentals"],generated["files"]["games"])
+
+        ingest_time=time.perf_counter()-started
+
+        scenarios["ingest"]={
+            "total_seconds":round(ingest_time,4),
+            "rental_lines":rental_progress.lines_read,
+            "rentals_kept":rental_progress.records_kept,
+            "duplicates_removed":rental_progress.duplicates_removed,
+            "records_rejected":rental_progress.records_rejected,
+            "games_kept":game_progress.records_kept,
+            "rental_lines_per_second":round(rental_progress.lines_read/ingest_time),
+            "database_bytes":sum(os.path.getsize(file_name) for file_name in ("RentalCompany.db","RentalCompany.db-wal") if os.path.exists(file_name)),
+        }
+
+        titles=generated["titles"]
+
+        game_ids_by_title=generated["game_ids_by_title"]
+
+        search_arguments=[(popular_pick(random_numbers,titles),random_numbers.choice(PLATFORMS)) for call in range(calls)]
+
+        search_results,scenarios["search"]=time_calls(get_available_games_info,search_arguments)
+
+        scenarios["search"]["games_found"]=sum(len(games) for games in search_results)
+
+        #The subscription file is read by the first rental of a session, which is timed on its own.
+        started=time.perf_counter()
+
+        get_subscriptions("Customer Subscription Data.txt")
+
+        scenarios["subscription_load"]={"total_seconds":round(time.perf_counter()-started,4)}
+
+        #Copies of popular titles are mostly rented out already, so the copies are picked from every title alike.
+        rent_arguments=[(customer_id(random_numbers.randrange(settings.customers)),
+                         str(random_numbers.choice(random_numbers.choice(game_ids_by_title)))) for call in range(calls)]
+
+        rent_results,scenarios["rent"]=time_calls(can_customer_rent_another_game,rent_arguments)
+
+        scenarios["rent"]["outcomes"]=count_outcomes(rent_results,{
+            "rented":"succesfully rented out",
+            "game_rented_out":"currently rented out",
+            "too_many_rentals":"too many active",
+            "no_subscription":"no active subscription",
+            "no_account":"No record of customer"})
+
+        rented_game_ids=[game_id for (customer,game_id),message in zip(rent_arguments,rent_results) if "succesfully rented out" in message]
+
+        return_arguments=[(game_id,) for game_id in rented_game_ids]
+
+        return_arguments+=[(str(random_numbers.choice(random_numbers.choice(game_ids_by_title))),) for call in range(max(0,calls-len(return_arguments)))]
+
+        return_results,scenarios["return"]=time_calls(returning_game,return_arguments)
+
+        scenarios["return"]["outcomes"]=count_outcomes(return_results,{
+            "returned":"successfully returned",
+            "at_store":"currently avaliable for hire",
+            "unknown_game":"does not exist"})
+
+        budget_arguments=[(10000,month) for month in MONTHS]
+
+        #pandas is imported first, so the first call is not timed importing it.
+        importlib.import_module("pandas")
+
+        query_cache.clear()
+
+        buy_results,scenarios["games_to_buy"]=time_calls(games_to_buy,budget_arguments)
+
+        buy_results,scenarios["games_to_buy_cached"]=time_calls(games_to_buy,budget_arguments)
+
+    finally:
+
+        os.chdir(previous_directory)
+
+        set_database_name(previous_database_name)
+
+        if directory is None and keep_files==False:
+
+            shutil.rmtree(working_directory,ignore_errors=True)
+
+    return(results)
+
+if __name__=="__main__":
+
+    parser=argparse.ArgumentParser(description="Time the rental company software on synthetic data and save the results as json.")
+    parser.add_argument("--preset",choices=sorted(PRESETS),default="small",help="the size of the synthetic data")
+    parser.add_argument("--titles",type=int,help="the number of titles, overriding the preset")
+    parser.add_argument("--customers",type=int,help="the number of customers, overriding the preset")
+    parser.add_argument("--rentals",type=int,help="the number of rental lines, overriding the preset")
+    parser.add_argument("--seed",type=int,default=2023,help="the seed of the synthetic data")
+    parser.add_argument("--reference-date",type=date.fromisoformat,help="the last day of the rental history, today by default. "
+                        "The subscriptions are always generated around today, as the rentals are checked against today")
+    parser.add_argument("--calls",type=int,default=200,help="the number of calls timed for the search, rent and return scenarios")
+    parser.add_argument("--directory",help="the directory to write the data and database to, kept after the run")
+    parser.add_argument("--keep-files",action="store_true",help="keep the temporary directory after the run")
+    parser.add_argument("--output",help="the json file to save the results to, benchmark-<preset>-<time>.json by default")
+    arguments=parser.parse_args()
+
+    sizes=dict(PRESETS[arguments.preset])
+
+    for size in ("titles","customers","rentals"):
+
+        if getattr(arguments,size) is not None:
+
+            sizes[size]=getattr(arguments,size)
+
+    benchmark_settings=SyntheticDataSettings(seed=arguments.seed,reference_date=arguments.reference_date,**sizes)
+
+    benchmark_results=run_benchmark(benchmark_settings,arguments.calls,arguments.directory,arguments.keep_files)
+
+    benchmark_results["preset"]=arguments.preset
+
+    output_file_name=arguments.output or f"benchmark-{arguments.preset}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+
+    with open(output_file_name,"w") as output_file:
+
+        json.dump(benchmark_results,output_file,indent=2)
+
+    json.dump(benchmark_results["scenarios"],sys.stdout,indent=2)
+
+    print(f"\nResults saved to {output_file_name}")
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:39:15 2026
+
+@author: James
+"""
+from connectionManager import get_connection
+
+"""
+This module searches the game catalogue by title while tolerating the way titles get typed at the counter.
+It reads the 'Catalogue Search' full text index, which splits every title into trigrams (runs of three characters)
+and is kept up to date by triggers whenever a game or genre is added to the catalogue.
+
+Two kinds of search are offered:
+   - A prefix search, which finds titles starting with what has been typed so far.
+   - A fuzzy search, which finds titles sharing the most trigrams with what was typed,
+     so a title is still found with a letter missing, added or swapped. Only the titles containing a chunk
+     of the query as it was typed are scored, unless no title does.
+Both can be narrowed down to a platform and a genre, and both return the best matches first.
+"""
+
+#The fuzzy search ranks this many candidates per requested result before keeping the best ones.
+FUZZY_CANDIDATES_PER_RESULT=5
+
+#The fuzzy search first looks for titles containing one chunk of the query unchanged. The query is cut into
+#one more chunk than the typing mistakes it allows for, each at least FUZZY_CHUNK_LENGTH characters long.
+FUZZY_MISTAKES=2
+
+FUZZY_CHUNK_LENGTH=4
+
+#Up to this many titles containing a chunk of the query are scored directly, more are ranked by bm25 first.
+FUZZY_CHUNK_CANDIDATES=500
+
+def title_trigrams(text):
+    """
+    This splits a piece of text into the set of lowercase trigrams the search index is built from.
+    It takes a string as input and returns a set of strings, which is empty for text shorter than three characters.
+    """
+    text=text.lower()
+
+    return({text[position:position+3] for position in range(len(text)-2)})
+
+def trigram_similarity(query_trigrams,title):
+    """
+    This scores how closely a title matches a query.
+    It takes the set of trigrams of the query and a title, and returns the share of
+    trigrams that the two have in common, from 0 for nothing in common to 1 for the same text.
+    """
+    trigrams_of_title=title_trigrams(title)
+
+    trigrams_in_either=len(query_trigrams | trigrams_of_title)
+
+    if trigrams_in_either==0:
+
+        return(0.0)
+
+    return(len(query_trigrams & trigrams_of_title)/trigrams_in_either)
+
+def quote_match_term(term):
+    """
+    This quotes a piece of text as a phrase of an fts5 match expression.
+    """
+    return('"'+term.replace('"','""')+'"')
+
+def match_chunks(query):
+    """
+    This builds the match expression which finds the titles containing any chunk of the query unchanged.
+    The query is cut into FUZZY_MISTAKES+1 chunks of about the same length, or fewer for a short query so that
+    no chunk is shorter than FUZZY_CHUNK_LENGTH characters. A title typed with no more mistakes than there are
+    chunks less one still contains at least one chunk as it was typed, and each chunk is a substring search of
+    several trigrams, so far fewer titles match than share a single trigram with the query.
+    It returns the expression as a str, or None if the query is too short to be cut into two chunks.
+    """
+    chunk_count=min(len(query)//FUZZY_CHUNK_LENGTH,FUZZY_MISTAKES+1)
+
+    if chunk_count<2:
+
+        return(None)
+
+    starts=[chunk*len(query)//chunk_count for chunk in range(chunk_count)]+[len(query)]
+
+    chunks=sorted({query[start:end].lower() for start,end in zip(starts,starts[1:])})
+
+    return("Title : ("+" OR ".join(quote_match_term(chunk) for chunk in chunks)+")")
+
+def match_trigrams(query_trigrams):
+    """
+    This builds the match expression which finds the titles sharing any trigram with the query.
+    """
+    return("Title : ("+" OR ".join(quote_match_term(trigram) for trigram in sorted(query_trigrams))+")")
+
+def escape_like_pattern(text):
+    """
+    This escapes the characters which LIKE treats as wildcards, so that the text is matched as it was typed.
+    The escaped text must be used with ESCAPE '\\'.
+    """
+    return(text.replace("\\","\\\\").replace("%","\\%").replace("_","\\_"))
+
+def facet_conditions(platform,genre):
+    """
+    This builds the extra sql conditions and parameters used to narrow a search down to a platform and genre.
+    It returns a tuple containing the conditions as a string and a list of parameters.
+    """
+    conditions=""
+    parameters=[]
+
+    if platform:
+
+        conditions+=" AND LOWER(Platform) = ?"
+        parameters.append(platform.lower())
+
+    if genre:
+
+        conditions+=" AND '|'||LOWER(Genres)||'|' LIKE ? ESCAPE '\\'"
+        parameters.append(f"%|{escape_like_pattern(genre.lower())}|%")
+
+    return(conditions,parameters)
+
+def prefix_search(query,platform=None,genre=None,limit=10):
+    """
+    Searches the catalogue for titles which begin with the query, ignoring case.
+    It takes the query and optionally a platform, a genre and the most results to return.
+    It returns a list of tuples made up of the catalogue index, title, platform and genres,
+    with the shortest, so closest, titles first.
+    The LIKE pattern is answered from the trigram index once the query is three characters long.
+    The index cannot answer a LIKE with an ESCAPE clause, so the clause is only added when the query
+    holds a wildcard or escape character which has to be matched as it was typed.
+    """
+    conditions,parameters=facet_conditions(platform,genre)
+
+    pattern=escape_like_pattern(query)
+
+    title_condition="Title LIKE ?" if pattern==query else "Title LIKE ? ESCAPE '\\'"
+
+    cursor=get_connection().cursor()
+
+    cursor.execute(f"""
+        SELECT rowid,Title,Platform,Genres
+        FROM "Catalogue Search"
+        WHERE {title_condition} {conditions}
+        ORDER BY LENGTH(Title),Title,Platform
+        LIMIT ?
+        """,[pattern+"%",*parameters,limit])
+
+    return(cursor.fetchall())
+
+def search_index(match_expression,conditions,parameters,limit,ranked):
+    """
+    This runs a match expression against the catalogue search index, narrowed down by the facet conditions.
+    It returns a list of tuples made up of the catalogue index, title, platform and genres, at most limit long,
+    ordered by bm25 if ranked is True and in index order otherwise.
+    """
+    cursor=get_connection().cursor()
+
+    cursor.execute(f"""
+        SELECT rowid,Title,Platform,Genres
+        FROM "Catalogue Search"
+        WHERE "Catalogue Search" MATCH ? {conditions}
+        {"ORDER BY rank" if ranked else ""}
+        LIMIT ?
+        """,[match_expression,*parameters,limit])
+
+    return(cursor.fetchall())
+
+def fuzzy_search(query,platform=None,genre=None,limit=10):
+    """
+    Searches the catalogue for the titles that best match the query, allowing for typing mistakes.
+    It takes the query and optionally a platform, a genre and the most results to return.
+    The index first returns the titles containing a chunk of the query unchanged, which are few enough
+    to be scored without ranking them in the index. When there are more than FUZZY_CHUNK_CANDIDATES
+    of them, only that many are scored, the best ranked by bm25. A query with a mistake in every chunk falls back to the titles
+    sharing any trigram with the query, ranked by bm25.
+    The candidates are then ordered by how many trigrams they share with the query.
+    It returns a list of tuples made up of the catalogue index, title, platform, genres and the similarity score.
+    Queries too short to contain a trigram fall back to a prefix search.
+    """
+    query_trigrams=title_trigrams(query)
+
+    if len(query_trigrams)==0:
+
+        return([(*match,1.0) for match in prefix_search(query,platform,genre,limit)])
+
+    conditions,parameters=facet_conditions(platform,genre)
+
+    candidates=[]
+
+    chunk_expression=match_chunks(query)
+
+    if chunk_expression is not None:
+
+        candidates=search_index(chunk_expression,conditions,parameters,FUZZY_CHUNK_CANDIDATES+1,False)
+
+        if len(candidates)>FUZZY_CHUNK_CANDIDATES:
+
+            candidates=search_index(chunk_expression,conditions,parameters,FUZZY_CHUNK_CANDIDATES,True)
+
+    if len(candidates)==0:
+
+        candidates=search_index(match_trigrams(query_trigrams),conditions,parameters,limit*FUZZY_CANDIDATES_PER_RESULT,True)
+
+    candidates=[(*candidate,trigram_similarity(query_trigrams,candidate[1])) for candidate in candidates]
+
+    candidates.sort(key=lambda candidate:-candidate[4])
+
+    return(candidates[:limit])
+
+def suggest_titles(query,platform=None,limit=5):
+    """
+    This suggests the titles a member of staff most likely meant when a search finds nothing.
+    It takes the query and optionally a platform, and returns a list of distinct titles, best match first.
+    """
+    suggestions=[]
+
+    for match in fuzzy_search(query,platform,limit=limit*FUZZY_CANDIDATES_PER_RESULT):
+
+        if match[1] not in suggestions:
+
+            suggestions.append(match[1])
+
+    return(suggestions[:limit])
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 12:13:11 2026
+
+@author: James
+"""
+import calendar
+import io
+import threading
+from gameSelect import month_to_int,most_popular_title_for_month_graph,most_popular_genre_for_month_graph
+from queryCache import QueryCache,get_cache_version
+
+"""
+This module draws the popularity charts of gameSelect.py and keeps the rendered images, so showing
+the chart of a month again does not draw it again.
+The images are kept against the kind of chart, the month, the image format, png or svg, and the database file
+and its data version from queryCache.py, so a chart is drawn again once a rental or return changes its figures
+or another database file is used.
+Only the CHART_CACHE_SIZE most recently used images are kept, and every figure is closed as soon as it is
+saved, so the memory used stays the same however long the menu is open.
+The charts of every month can be drawn ahead of time on a background thread with start_prerender.
+"""
+
+CHART_CACHE_SIZE=48
+
+CHART_FUNCTIONS={
+    "title":most_popular_title_for_month_graph,
+    "genre":most_popular_genre_for_month_graph,
+}
+
+IMAGE_FORMATS=("png","svg")
+
+#pyplot keeps a list of open figures which is not safe to change from two threads at once.
+chart_lock=threading.Lock()
+
+def month_number(month):
+    """
+    This turns a month, given as its name or as an integer from 1 to 12, into its integer.
+    A ValueError is raised for anything else.
+    """
+    number=month_to_int(month) if isinstance(month,str) else month
+
+    if number not in range(1,13):
+
+        raise ValueError(f"{month} is not a month")
+
+    return(number)
+
+def render_figure(chart_function,arguments,image_format="png"):
+    """
+    This draws a chart and saves it as an image.
+    It takes a function returning a matplotlib figure, its arguments and the image format,
+    and returns the image as bytes. The figure is closed once it is saved, so pyplot does not keep it open.
+    """
+    import matplotlib.pyplot as plt
+
+    with chart_lock:
+
+        figure=chart_function(*arguments)
+
+        try:
+
+            image=io.BytesIO()
+
+            figure.savefig(image,format=image_format)
+
+        finally:
+
+            plt.close(figure)
+
+    return(image.getvalue())
+
+class ChartService:
+    """
+    Draws the popularity charts and holds the most recently used images for one data version of the database.
+
+    The images are held in a QueryCache from queryCache.py, which drops the least recently used image
+    and empties itself when the data version changes. The service can be shared between threads,
+    the charts themselves are drawn one at a time.
+    """
+    def __init__(self,max_size=CHART_CACHE_SIZE):
+
+        self.images=QueryCache(max_size)
+
+        self.renders=0
+
+    def get_chart(self,chart_type,month,image_format="png"):
+        """
+        This returns the chart of the most popular titles or genres of a month as image bytes,
+        drawing it only if it is not already stored for the current data version.
+        It takes the kind of chart, 'title' or 'genre', the month as its name or integer and
+        the image format, 'png' or 'svg'. A ValueError is raised for any other kind, month or format.
+        """
+        if chart_type not in CHART_FUNCTIONS or image_format not in IMAGE_FORMATS:
+
+            raise ValueError(f"There is no {image_format} chart of {chart_type} popularity")
+
+        month=month_number(month)
+
+        key=(chart_type,month,image_format)
+
+        data_version=get_cache_version()
+
+        found,image=self.images.get(key,data_version)
+
+        if found==False:
+
+            #The title chart reads the name of the month, the genre chart its number.
+            arguments=(calendar.month_name[month],) if chart_type=="title" else (month,)
+
+            image=render_figure(CHART_FUNCTIONS[chart_type],arguments,image_format)
+
+            self.renders+=1
+
+            self.images.put(key,data_version,image)
+
+        return(image)
+
+    def prerender(self,chart_types=("title",),image_format="png",stop_event=None):
+        """
+        This draws the charts of every month for the kinds of chart given, so they are ready when asked for.
+        A month with no rentals to chart, which gameSelect.py reports with a ValueError, is skipped and the
+        other months are still drawn. It stops early if the stop event is set.
+        It returns a list of the kind of chart and month of every chart skipped.
+        """
+        skipped=[]
+
+        for chart_type in chart_types:
+
+            for month in range(1,13):
+
+                if stop_event is not None and stop_event.is_set():
+
+                    return(skipped)
+
+                try:
+
+                    self.get_chart(chart_type,month,image_format)
+
+                except ValueError:
+
+                    skipped.append((chart_type,month))
+
+        return(skipped)
+
+    def start_prerender(self,chart_types=("title",),image_format="png"):
+        """
+        This draws the charts of every month on a background thread.
+        It returns a threading.Event which stops the thread after the chart it is drawing when set.
+        """
+        stop_event=threading.Event()
+
+        threading.Thread(target=self.prerender,args=(chart_types,image_format,stop_event),
+                         name="chart prerender",daemon=True).start()
+
+        return(stop_event)
+
+chart_service=ChartService()
+
+def get_chart(chart_type,month,image_format="png"):
+    """
+    This returns a popularity chart of a month as image bytes from the shared chart service.
+    """
+    return(chart_service.get_chart(chart_type,month,image_format))
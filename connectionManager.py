@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:35:51 2026
+
+@author: James
+"""
+import os
+import random
+import sqlite3
+import threading
+import time
+
+"""
+This module hands out the connections every other module uses to reach the rental company database.
+Opening a connection and configuring it costs more than most of the queries the rental counter runs,
+so each thread is given one connection which it keeps reusing until it is closed.
+The connections are tuned once when they are opened:
+   - journal_mode WAL lets the searches keep reading while a rental or return is being written.
+   - synchronous NORMAL only syncs the write ahead log at checkpoints, which is safe in WAL mode.
+   - mmap_size and cache_size keep the hot pages of the database in memory.
+   - busy_timeout makes a connection wait for a writer on another thread instead of failing straight away.
+"""
+
+DATABASE_NAME='RentalCompany.db'
+
+CONNECTION_PRAGMAS=(
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+
+#A transaction which still finds the database locked after the busy timeout is retried this many times in total.
+TRANSACTION_ATTEMPTS=5
+
+TRANSACTION_RETRY_DELAY=0.05
+
+_thread_connections=threading.local()
+
+_connection_generation_lock=threading.Lock()
+
+#This is increased whenever every connection is to be closed, so threads know their connection is stale.
+_connection_generation=0
+
+def set_database_name(database_name):
+    """
+    This changes the database file that new connections are opened against.
+    It takes the file name as input. Every open connection is marked as stale, so each thread
+    closes its connection and reconnects to the new database the next time it asks for a connection.
+    """
+    global DATABASE_NAME
+
+    close_all_connections()
+
+    DATABASE_NAME=database_name
+
+def get_database_name():
+    """
+    This returns the full path of the database file that new connections are opened against.
+    """
+    return(os.path.abspath(DATABASE_NAME))
+
+def open_connection(database_name=None):
+    """
+    This opens a new connection to the rental company database with the tuned pragmas applied.
+    It takes an optional database file name and returns the sqlite3 connection.
+    The connection is not shared, the caller is responsible for closing it.
+    """
+    connection=sqlite3.connect(database_name or DATABASE_NAME,check_same_thread=False)
+
+    for pragma in CONNECTION_PRAGMAS:
+
+        connection.execute(pragma)
+
+    return(connection)
+
+def get_connection():
+    """
+    This returns the connection belonging to the calling thread, opening it the first time it is needed.
+    A connection made stale by close_all_connections is closed here, by the thread which owns it, and replaced.
+    The connection is reused by every query the thread runs, so callers must not close it.
+    Writes should be made through run_in_transaction, so they are committed or rolled back together.
+    """
+    connection=getattr(_thread_connections,"connection",None)
+
+    generation=_connection_generation
+
+    if connection is not None and _thread_connections.generation!=generation:
+
+        close_connection()
+
+        connection=None
+
+    if connection is None:
+
+        connection=open_connection()
+
+        _thread_connections.connection=connection
+
+        _thread_connections.generation=generation
+
+    return(connection)
+
+def close_connection():
+    """
+    This closes the connection belonging to the calling thread if it has one.
+    """
+    connection=getattr(_thread_connections,"connection",None)
+
+    if connection is not None:
+
+        _thread_connections.connection=None
+
+        connection.close()
+
+def close_all_connections():
+    """
+    This closes the connections of every thread, for example before the database file is replaced.
+    The connection of the calling thread is closed straight away. The connection of any other thread
+    is only marked as stale, since closing it could break a query that thread is part way through,
+    and that thread closes it and opens a new one the next time it asks for a connection.
+    """
+    global _connection_generation
+
+    with _connection_generation_lock:
+
+        _connection_generation+=1
+
+    close_connection()
+
+def is_database_busy(error):
+    """
+    This checks whether an sqlite3 error was caused by another connection holding the database lock.
+    It returns a boolean expression, True if the operation can be retried.
+    """
+    message=str(error).lower()
+
+    return("locked" in message or "busy" in message)
+
+def run_in_transaction(transaction_function,*arguments):
+    """
+    This runs a function inside one BEGIN IMMEDIATE transaction on the calling thread's connection.
+    BEGIN IMMEDIATE takes the write lock before anything is read, so the checks the function makes
+    cannot be invalidated by another terminal before its writes are committed, while other
+    connections can still read the database.
+    The function is called with the arguments given and uses get_connection for its queries.
+    Its writes are committed when it returns and rolled back if it raises an exception.
+    If the database stays locked by another writer the whole transaction is retried after a short,
+    randomised and growing delay. It returns whatever the function returns.
+    """
+    connection=get_connection()
+
+    for attempt in range(1,TRANSACTION_ATTEMPTS+1):
+
+        try:
+
+            with connection:
+
+                connection.execute("BEGIN IMMEDIATE")
+
+                return(transaction_function(*arguments))
+
+        except sqlite3.OperationalError as error:
+
+            if attempt==TRANSACTION_ATTEMPTS or not is_database_busy(error):
+
+                raise
+
+        time.sleep(TRANSACTION_RETRY_DELAY*attempt*(1+random.random()))
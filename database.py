@@ -4,11 +4,18 @@ Created on Thu Nov  9 19:13:18 2023
 
 @author: James
 """
-from datetime import datetime
-import sqlite3
+import argparse
+import locale
+import os
+import re
+from itertools import chain,islice
+from connectionManager import get_connection,run_in_transaction,set_database_name
+from dateNormalizer import DateNormalizer,to_storage_date
+from databaseSchema import migrate_schema,count_foreign_key_violations
+from loadState import file_checksum,find_load_start,save_load_state
 
 """
-The below code initializes the creation of a database named 'RentalCompany'. 
+The below code initializes the creation of a database named 'RentalCompany' when initialise_database is called. 
 This database is established to manage and store data important to a game rental business. 
 It is constructed with several different tables, each with a unique purpose in the data management scheme.
 
@@ -35,58 +42,18 @@ It is constructed with several different tables, each with a unique purpose in t
    - Tailored to classify games based on their genre.
    - It has 'Title' and 'Genre' columns.
 
+The table definitions, their primary keys and indexes are kept in databaseSchema.py,
+which also upgrades a database created by an older version of this code in place.
+
+Importing this module does not touch the database or the text files, initialise_database does both,
+so the menu and other tools decide when the work is done. It can also be run from the command line:
+    python database.py
+    python database.py --schema-only
 """
 
-connection_to_sql_database=sqlite3.connect('RentalCompany.db')
-cursor=connection_to_sql_database.cursor()
-cursor.execute('CREATE TABLE IF NOT EXISTS Games\
-               ("Game Id" integer not null, \
-                Title varchar(20),\
-                    Platform varchar(20),\
-                        Genre varchar(20),\
-                            "Purchase Price" int, \
-                                "Purchase Date" DATETIME)')
-connection_to_sql_database.commit()
-connection_to_sql_database.close()
-
-connection_to_sql_database=sqlite3.connect('RentalCompany.db')
-cursor=connection_to_sql_database.cursor()
-cursor.execute('CREATE TABLE IF NOT EXISTS "Game Rentals" \
-               ("Rental Index" integer,\
-                "Customer Id" integer,\
-                "Game Id" integer )')
-connection_to_sql_database.commit()
-connection_to_sql_database.close()
-
-connection_to_sql_database=sqlite3.connect('RentalCompany.db')
-cursor=connection_to_sql_database.cursor()
-cursor.execute('CREATE TABLE IF NOT EXISTS "Rental Periods"\
-               ("Rental Index" integer not null, \
-                            "Rental Start Date" DATETIME, \
-                                "Rental End Date" DATETIME)')
-connection_to_sql_database.commit()
-connection_to_sql_database.close()
-
-connection_to_sql_database=sqlite3.connect('RentalCompany.db')
-cursor=connection_to_sql_database.cursor()
-cursor.execute('CREATE TABLE IF NOT EXISTS "Game Catalogue"\
-               ("Catalogue Index" INTEGER PRIMARY KEY AUTOINCREMENT,\
-                Title VARCHAR(20),\
-                Platform VARCHAR(20),\
-                "Purchase Price" INTEGER,\
-                UNIQUE (Platform, Title, "Purchase Price"))')
-
-connection_to_sql_database.commit()
-connection_to_sql_database.close()
-
-connection_to_sql_database=sqlite3.connect('RentalCompany.db')
-cursor=connection_to_sql_database.cursor()
-cursor.execute('CREATE TABLE IF NOT EXISTS "Game Genres"\
-               (Title varchar(20),\
-                    Genre varchar(20),\
-                        UNIQUE (Title,Genre))')
-connection_to_sql_database.commit()
-connection_to_sql_database.close()
+RENTAL_FILE_NAME=r"Customer Rental Data.txt"
+
+GAME_FILE_NAME=r"Business Games_data.txt"
 
 class GameCatalog:
     """
@@ -97,7 +64,10 @@ class GameCatalog:
     title, platform, genre, purchase price, and purchase date. These details 
     are intended to be temporarily held in this structure before being uploaded 
     into an SQL database for permanent storage and retrieval.
+    The attributes are declared in __slots__, so an object has no __dict__ and takes far less memory.
     """
+    __slots__ = ("game_id", "title", "genre", "platform", "purchase_price", "purchase_date")
+
     def __init__(self, game_id, title,platform,genre,purchase_price,purchase_date):
         
         self.game_id = game_id
@@ -118,21 +88,157 @@ class GameCatalog:
         
     
 """
-This code opens a text file that lists the games owned by a rental business. 
-It reads and parses this data into objects, each representing a unique game copy. 
-These objects are then added to a list named 'game_text_data', which is prepared 
-for subsequent insertion into an SQL database.
+The text files are read, cleaned and inserted a chunk of records at a time, so the memory used by a load
+does not grow with the length of the files. Each file is read by a generator which yields one cleaned
+record after another, the records are grouped into lists of INGEST_CHUNK_SIZE and each list is inserted
+with executemany before the next one is read.
+Loads are incremental, each one starts at the byte offset the last one stopped at, which is kept in the
+'Load State' table by loadState.py, so only the lines added to a file since then are read.
 """
-game_text_data = []
-with open(r"Business Games_data.txt", "r") as file_data:
-    next(file_data) 
-    for line in file_data:  
-        line = line.strip("\n")  
+INGEST_CHUNK_SIZE=50000
+
+#This many of the rows with an ambiguous date are shown in the report of a load.
+AMBIGUOUS_DATE_SAMPLE_SIZE=10
+
+#The text files are read in binary to know the byte offset of every line, then decoded as open() would.
+FILE_ENCODING=locale.getpreferredencoding(False)
+
+class IngestProgress:
+    """
+    Keeps count of how far the load of one text file has got.
+
+    It is updated by the generator reading the file and passed to the progress function of
+    bulk_load_rental_company_data after every chunk. The byte offset and line number are those of
+    the end of the last line cleaned, counted from the start of the file, so a load can carry on from them.
+    """
+    def __init__(self, file_name, bytes_read=0, line_number=1):
+        
+        self.file_name = file_name
+        
+        self.file_size = os.path.getsize(file_name)
+        
+        self.bytes_read = bytes_read
+        
+        self.line_number = line_number
+        
+        self.lines_read = 0
+        
+        self.records_kept = 0
+        
+        self.duplicates_removed = 0
+        
+        self.records_rejected = 0
+        
+        #The date normalizer of each date column of the file, by column name, for the report of its dates.
+        self.date_normalizers = {}
+
+    def line_read(self, offset):
+        """
+        This records that one more line has been cleaned, it takes the byte offset just past the line.
+        """
+        self.bytes_read = offset
+        
+        self.line_number += 1
+        
+        self.lines_read += 1
+
+    def percentage_read(self):
+        """
+        This returns how much of the file has been read as a percentage.
+        """
+        if self.file_size==0:
+            
+            return(100.0)
+        
+        return(min(100.0,100*self.bytes_read/self.file_size))
+
+    def ambiguous_date_sample(self, sample_size=AMBIGUOUS_DATE_SAMPLE_SIZE):
+        """
+        This returns the first rows found with an ambiguous date, which could be read as more than one day.
+        It returns a list of at most sample_size tuples of the column name, line number and date as written.
+        """
+        ambiguous_dates = sorted((row, column, date) for column, date_normalizer in self.date_normalizers.items()
+                                 for row, date in date_normalizer.ambiguous_rows)
+        
+        return([(column, row, date) for row, column, date in ambiguous_dates[:sample_size]])
+
+    def __str__(self):
+        
+        report = (f"{self.file_name}: {self.percentage_read():.0f}% read, {self.lines_read} new lines read, "
+                  f"{self.records_kept} records kept, {self.duplicates_removed} duplicates and "
+                  f"{self.records_rejected} invalid records removed")
+        
+        for column, date_normalizer in self.date_normalizers.items():
+            
+            report += (f", {column} mostly written as {date_normalizer.dominant_format or 'unknown'} "
+                       f"with {date_normalizer.ambiguous_row_count} ambiguous dates")
+        
+        return (report)
+
+def print_progress(ingest_progress):
+    """
+    This prints the progress of a load, it is the progress function used when database.py is run directly.
+    """
+    print(ingest_progress)
+
+def print_ambiguous_dates(ingest_progress):
+    """
+    This prints the first rows of a load whose date could be read as more than one day, so they can be checked by hand.
+    """
+    ambiguous_dates = ingest_progress.ambiguous_date_sample()
+    
+    if ambiguous_dates:
+        
+        print(f"{ingest_progress.file_name}: first rows with an ambiguous date, read in the order of dateNormalizer.DATE_FORMATS:")
+        
+        for column, row, date in ambiguous_dates:
+            
+            print(f"    line {row}, {column} {date}")
+
+def print_foreign_key_violations():
+    """
+    This prints the number of rows of each table which refer to a row missing from another table.
+    The foreign keys of the schema are not enforced, so these rows are loaded and only reported here.
+    """
+    for (table_name, parent_table), row_count in count_foreign_key_violations(get_connection()).items():
+        
+        print(f"{table_name}: {row_count} rows refer to a row missing from {parent_table}.")
+
+def read_new_lines(file_name,offset):
+    """
+    This reads the lines of a text file from a byte offset, skipping the header line if it starts at the beginning.
+    It yields a tuple of the text of each line, without its line ending, and the byte offset just past the line.
+    A last line without a line ending may still be being written, so it is left for the next load.
+    """
+    with open(file_name, "rb") as file_data:
+        file_data.seek(offset)
+        if offset==0:
+            offset+=len(file_data.readline())
+        for line in file_data:
+            if not line.endswith(b"\n"):
+                return
+            offset+=len(line)
+            yield(line.decode(FILE_ENCODING).strip("\r\n"),offset)
+
+def read_game_records(ingest_progress):
+    """
+    This reads a text file that lists the games owned by a rental business one line at a time,
+    starting where the progress given says the last load stopped. 
+    It parses each line into an object representing a unique game copy and yields the objects
+    one after another, ready for insertion into an SQL database, updating the progress given as it goes.
+    Blank lines are skipped.
+    """
+    for line,offset in read_new_lines(ingest_progress.file_name,ingest_progress.bytes_read):  
         line_elements = line.split("\t") 
-        if line_elements: 
+        ingest_progress.line_read(offset)
+        if line: 
             game = GameCatalog(*line_elements)  
-            game_text_data.append(game)  
+            ingest_progress.records_kept+=1
+            yield game
             
+#This many lines are read ahead to work out the dominant date format of each column.
+DATE_SAMPLE_SIZE=1000
+
 class GameRentals:
     """
     Represents a single rental in the rental business's rental records.
@@ -142,7 +248,10 @@ class GameRentals:
     rental start, rental end, and customer id. Rental index is the primary key.
     These details are intended to be temporarily held in this structure before being uploaded 
     into an SQL database for permanent storage and retrieval.
+    The attributes are declared in __slots__, so an object has no __dict__ and takes far less memory.
     """
+    __slots__ = ("rental_index", "game_id", "rental_start", "rental_end", "customer_id")
+
     def __init__(self, rental_index,game_id, rental_start,rental_end,customer_id):
         
         self.rental_index=rental_index
@@ -155,70 +264,46 @@ class GameRentals:
         
         self.customer_id = customer_id
 
-    #This function is used to check that the generated object is not already present within our stored list
-    def game_rental_duplicate_check(self,game_rental_list):
+    def rental_key(self):
+        """
+        Involved in data cleaning, this builds the key used to identify duplicate rental records.
+        It returns the game id, rental start, rental end and customer id joined by tabs, which cannot
+        appear inside a field, as one string is far smaller to keep in memory than a tuple of four.
+        """
+        return("\t".join((self.game_id,self.rental_start,self.rental_end,self.customer_id)))
+
+    #This function is used to check that the generated object is not already present within our stored records
+    def game_rental_duplicate_check(self,game_rental_keys):
         """
         Involved in data cleaning this function removes duplicate entries of rental records.
-        It takes the object as input and a list containing a list of all current rental records.
+        It takes the object as input and a set containing the rental keys of all rental records kept so far.
         It returns a boolean expression which if True implies that the rental record object of interest is a duplicate entry.
+        Looking the key up in a set takes constant time, so the check no longer grows with the number of records.
         """
-        duplicates=0
-        
-        for game_rental in game_rental_list:
-            
-            is_same_game_id=game_rental.game_id == self.game_id
-            
-            is_same_game_rental_start=game_rental.rental_start==self.rental_start
-            
-            is_same_game_rental_end=game_rental.rental_end==self.rental_end
-            
-            is_same_customer_id=game_rental.customer_id==self.customer_id
-
-            if is_same_game_id and is_same_game_rental_start and is_same_game_rental_end and is_same_customer_id:
-                
-                duplicates+=1
-                
-        game_rental_duplicate=(duplicates>0)
+        game_rental_duplicate=self.rental_key() in game_rental_keys
         
         return(game_rental_duplicate)
     
-    def format_date_correctly(self):
+    def format_date_correctly(self,rental_start_dates=None,rental_end_dates=None,row=None):
         """
         Involved in data cleaning it ensures that the rental dates are in the correct datetime of a day,month and year.
         This function updates the values of the rental dates to be modified to the correct format.
+        It optionally takes the date normalizers of the start and end date columns of the load, which cache
+        the cleaned dates, and the row of the file the rental came from, which is recorded if a date is ambiguous.
         """
-        self.rental_start = self._format_date(self.rental_start)
+        self.rental_start = (rental_start_dates or DateNormalizer()).normalize(self.rental_start,row)
         
         if not(self.rental_end =="" or self.rental_end== None):
             
-            self.rental_end = self._format_date(self.rental_end)
+            self.rental_end = (rental_end_dates or DateNormalizer()).normalize(self.rental_end,row)
 
     def _format_date(self, date):
         """
         Involved in data cleaning, this changes the format of dates.
         It takes a date as input and returns a corrected date format.
+        The formats tried and their order are kept in dateNormalizer.py.
         """
-        if isinstance(date, str):
-            # we need to add functionality to check the previous date too format.
-            for fmt in ("%d/%m/%Y", "%d/%Y/%m", "%Y/%d/%m", "%m/%d/%Y", "%m/%Y/%d", "%Y/%m/%d","%m-%d-%Y", "%d-%Y-%m", "%Y-%d-%m", "%d-%m-%Y", "%m-%Y-%d", "%Y-%m-%d"):
-                
-                try:
-                    
-                    return datetime.strptime(date, fmt).strftime("%d-%m-%Y")
-               
-                except ValueError:
-                    
-                    continue
-                
-            raise ValueError(f"Date format for '{date}' is not recognized")
-            
-        elif isinstance(date, datetime):
-            
-            return date.strftime("%d-%m-%Y")
-        
-        else:
-            
-            raise TypeError("Date must be a string or a datetime object")
+        return(DateNormalizer().normalize(date))
 
 
     def missing_data(self):
@@ -251,160 +336,202 @@ class GameRentals:
         return(id_size)
         
     
-"""
-This code opens a text file that lists the rentals records a rental companys has. 
-It reads and performs data cleaning operations like removing rental records with null data entries,
-duplicate entries,customer id with invalid sizes, incorrect datetime formats.
-It then parses the data into objects, each representing a unique rental transaction. 
-These objects are then added to a list named 'rental_text_data', which is prepared 
-for subsequent insertion into an SQL database.
-"""
-rental_text_data = []
-with open (r"Customer Rental Data.txt","r") as file_data:
+#A raw date can only equal a cleaned date if it is already written as two digit day, two digit month and year.
+CLEANED_DATE_PATTERN=re.compile(r"\d\d-\d\d-\d{4}")
+
+class RentalKeys:
+    """
+    The keys of the rental records kept so far, used by the duplicate check.
+
+    It behaves as a set of the keys kept by this load. When a file is loaded incrementally it also
+    looks a key up among the rentals stored by earlier loads, which are never held in memory, so the
+    lines added to a file are checked against every line before them, as a load of the whole file would.
+    """
+    def __init__(self, connection=None):
+        
+        self.keys = set()
+        
+        self.connection = connection
+
+    def add(self, rental_key):
+        
+        self.keys.add(rental_key)
+
+    def __contains__(self, rental_key):
+        
+        if rental_key in self.keys:
+            
+            return(True)
+        
+        if self.connection is None:
+            
+            return(False)
+        
+        return(is_rental_stored(self.connection,rental_key))
+
+def is_rental_stored(connection,rental_key):
+    """
+    Involved in data cleaning, this checks whether a rental record stored by an earlier load has the rental key given.
+    The stored dates are cleaned, so a key whose dates are not written in the cleaned format cannot match.
+    It returns a boolean expression, True if the record is already stored.
+    """
+    game_id,rental_start,rental_end,customer_id=rental_key.split("\t")
     
-    next(file_data) 
-    index=1
-    for line in file_data:  
+    if CLEANED_DATE_PATTERN.fullmatch(rental_start) is None or (rental_end!="" and CLEANED_DATE_PATTERN.fullmatch(rental_end) is None):
         
-        line = line.strip("\n")  
+        return(False)
+    
+    query="""
+    SELECT EXISTS (
+        SELECT 1 FROM 'Game Rentals' AS GR
+        INNER JOIN 'Rental Periods' AS RP ON RP.'Rental Index'=GR.'Rental Index'
+        WHERE GR."Customer Id"=? AND GR."Game Id"=? AND RP."Rental Start Date"=? AND RP."Rental End Date"=?)
+    """
+    
+    cursor=connection.execute(query,(customer_id,game_id,to_storage_date(rental_start),to_storage_date(rental_end)))
+    
+    return(cursor.fetchone()[0]==1)
+
+def read_rental_records(ingest_progress):
+    """
+    This reads a text file that lists the rentals records a rental companys has one line at a time,
+    starting where the progress given says the last load stopped. 
+    It performs data cleaning operations like removing rental records with null data entries,
+    duplicate entries,customer id with invalid sizes, incorrect datetime formats.
+    It then parses the data into objects, each representing a unique rental transaction,
+    and yields them one after another, ready for insertion into an SQL database,
+    updating the progress given as it goes.
+    Only the rental keys used to find duplicates are kept for the whole file, as a duplicate
+    can appear anywhere in it, every other object is released once its chunk has been inserted.
+    The rental index of each record is given when its chunk is stored. Blank lines are skipped.
+    Each date column has its own date normalizer for this load, kept in the progress given, which caches the
+    cleaned dates, works out the format the column is mostly written in from the first lines and records
+    the rows with ambiguous dates.
+    """
+    #The keys are recorded after the dates have been formatted, exactly as the stored records were compared before.
+    rental_text_keys = RentalKeys(get_connection() if ingest_progress.bytes_read>0 else None)
+    file_lines=read_new_lines(ingest_progress.file_name,ingest_progress.bytes_read)
+    sample_lines=list(islice(file_lines,DATE_SAMPLE_SIZE))
+    sample_elements=[line.split("\t") for line,offset in sample_lines]
+    rental_start_dates=ingest_progress.date_normalizers["Rental Start Date"]=DateNormalizer()
+    rental_end_dates=ingest_progress.date_normalizers["Rental End Date"]=DateNormalizer()
+    rental_start_dates.infer_dominant_format([line_elements[1] for line_elements in sample_elements if len(line_elements)>2])
+    rental_end_dates.infer_dominant_format([line_elements[2] for line_elements in sample_elements if len(line_elements)>2])
+    del sample_elements
+    for line,offset in chain(sample_lines,file_lines):  
         
         line_elements = line.split("\t") 
         
-        if line_elements: 
+        ingest_progress.line_read(offset)
+        
+        if line: 
             
-            game = GameRentals(index,*line_elements)
+            game = GameRentals(None,*line_elements)
             
-            duplicates=game.game_rental_duplicate_check(rental_text_data)
+            duplicates=game.game_rental_duplicate_check(rental_text_keys)
             
-            if (duplicates)==False and game.missing_data()==False and game.customer_id_correct_size()==True:
+            if duplicates==True:
                 
-                index+=1
-                game.format_date_correctly()
-                rental_text_data.append(game)  
+                ingest_progress.duplicates_removed+=1
+            
+            elif game.missing_data()==False and game.customer_id_correct_size()==True:
                 
+                game.format_date_correctly(rental_start_dates,rental_end_dates,ingest_progress.line_number)
+                rental_text_keys.add(game.rental_key())
+                ingest_progress.records_kept+=1
+                yield game
+            
+            else:
                 
-def insert_data_into_game_rentals(game_rental_data):
+                ingest_progress.records_rejected+=1
+
+def chunks(records,chunk_size):
+    """
+    This groups the records yielded by a generator into lists of at most chunk_size records.
+    It yields one list at a time, so only one chunk is held in memory at once.
+    """
+    records=iter(records)
     
+    while True:
+        
+        chunk=list(islice(records,chunk_size))
+        
+        if not chunk:
+            
+            return
+        
+        yield chunk
+                
+def next_rental_index(connection):
     """
-    This function inserts new rental entries into the game rental table 
-    within the rental company database.
-    It takes paramater which is a tuple object as input, 
-    this tuple consists of the rental index value, customer id and game id.
+    This returns the rental index the next rental added to the 'Game Rentals' table should have.
+    It is one more than the highest index stored or ever handed out by the AUTOINCREMENT key, so a record
+    loaded from a file never takes the index of a rental made at the counter.
     """
-    connection_to_sql_database=sqlite3.connect('RentalCompany.db')
-    cursor=connection_to_sql_database.cursor()
-
-    sqlite_insert_record_query="""Insert into 'Game Rentals' ('Rental Index','Customer Id','Game Id') VALUES (?,?,?)"""
+    cursor=connection.execute("""
+        SELECT MAX(COALESCE((SELECT MAX("Rental Index") FROM "Game Rentals"),0),
+                   COALESCE((SELECT seq FROM sqlite_sequence WHERE name='Game Rentals'),0))+1
+        """)
     
-    connection_to_sql_database.execute(sqlite_insert_record_query,game_rental_data)
-    connection_to_sql_database.commit()
-    connection_to_sql_database.close()
+    return(cursor.fetchone()[0])
 
-def insert_all_data_into_game_rentals(rental_text_data):
+def insert_all_data_into_game_rentals(rental_text_data,connection):
     """
     This converts rental transactions stored as a list of rental objects into a sql dataframe.
     It saves each of the rental transactions, each object encapsulates data about the rental records including
     the rental index, customer id and game id.
+    The rows are sent in one executemany call on the connection given, which is committed by the caller.
     """
-    for rental in rental_text_data:
-        insert_data_into_game_rentals((rental.rental_index,rental.customer_id,rental.game_id))
-        
-
-def insert_data_into_rental_periods(rental_period_data):
-    """
-    This function inserts new rental entries into the rental period table 
-    within the rental company database.
-    It takes a paramater which is a tuple object as input, 
-    this tuple consists of the rental index value, rental start date and rental end date.
-    """
-    connection = sqlite3.connect('RentalCompany.db')
-    cursor = connection.cursor()
-
-    insert_query = """INSERT INTO 'Rental Periods' ('Rental Index', 'Rental Start Date', 'Rental End Date') VALUES (?,?,?)"""
+    insert_query="""Insert into 'Game Rentals' ('Rental Index','Customer Id','Game Id') VALUES (?,?,?)"""
     
-    cursor.execute(insert_query, rental_period_data)
-    connection.commit()
-    connection.close()
+    connection.executemany(insert_query,((rental.rental_index,rental.customer_id,rental.game_id) for rental in rental_text_data))
 
-def insert_all_data_into_rental_periods(rental_period_text_data):
-   """This converts a list of rental period objects for insertion into the 'Rental Periods' table 
+def insert_all_data_into_rental_periods(rental_period_text_data,connection):
+    """This converts a list of rental period objects for insertion into the 'Rental Periods' table 
     of the rental company database. Each object in the list encapsulates data 
-    about the rental periods, including the rental index, start date, and end date."""
-   for period in rental_period_text_data:
-        insert_data_into_rental_periods((period.rental_index, period.rental_start, period.rental_end))
-
-def insert_data_into_game_catalogue(game_catalogue_data):
-    """This insert game catalogue information like title,platform and purchase price into a game catalogue table within the
-    sql database rental company."""
-
-    connection = sqlite3.connect('RentalCompany.db')
-    cursor = connection.cursor()
-
-    insert_query = """INSERT OR IGNORE INTO 'Game Catalogue' ('Title', 'Platform', 'Purchase Price') VALUES (?,?,?)"""
+    about the rental periods, including the rental index, start date, and end date.
+    The dates are stored as year-month-day text so the database can sort, index and range scan them.
+    The rows are sent in one executemany call on the connection given, which is committed by the caller."""
+    insert_query = """INSERT INTO 'Rental Periods' ('Rental Index', 'Rental Start Date', 'Rental End Date') VALUES (?,?,?)"""
     
-    cursor.execute(insert_query, game_catalogue_data)
-    connection.commit()
-    connection.close()
+    connection.executemany(insert_query,((period.rental_index, to_storage_date(period.rental_start), to_storage_date(period.rental_end)) for period in rental_period_text_data))
 
-def insert_all_data_into_game_catalogue(game_catalogue_text_data):
+def insert_all_data_into_game_catalogue(game_catalogue_text_data,connection):
     """
     Iterates through a list of game catalogue entries and inserts each entry into the 
     'Game Catalogue' table in the database. Each entry in the list is a distinct object 
     containing data about a game, such as its title, platform, and purchase price. 
+    The rows are sent in one executemany call on the connection given, which is committed by the caller.
     """
-    for catalogue in game_catalogue_text_data:
-        insert_data_into_game_catalogue((catalogue.title, catalogue.platform, catalogue.purchase_price))
-
-def insert_data_into_game_genres(game_genre_data):
-    """"This function is responsible for inserting new genre entries into the 'Game Genres' table of the rental company database.
-        It accepts a parameter in the form of a tuple, which includes the title of the game and its corresponding genre. 
-        This information is then recorded into the database, enhancing the genre-specific data available for each game."
-    """
-    connection = sqlite3.connect('RentalCompany.db')
-    cursor = connection.cursor()
-
-    insert_query = """INSERT OR IGNORE INTO 'Game Genres' ('Title', 'Genre') VALUES (?,?)"""
+    insert_query = """INSERT OR IGNORE INTO 'Game Catalogue' ('Title', 'Platform', 'Purchase Price') VALUES (?,?,?)"""
     
-    cursor.execute(insert_query, game_genre_data)
-    connection.commit()
-    connection.close()
+    connection.executemany(insert_query,((catalogue.title, catalogue.platform, catalogue.purchase_price) for catalogue in game_catalogue_text_data))
 
-def insert_all_data_into_game_genres(game_genre_text_data):
+def insert_all_data_into_game_genres(game_genre_text_data,connection):
     """"Involved in transferring a list of game genre information into the 'Game Genres' table in the database. 
-    Each object in the list represents a unique combination of a game's title and its genre. """
-    for genre in game_genre_text_data:
-        insert_data_into_game_genres((genre.title, genre.genre))
-
-def insert_data_into_sql(tuple_games):
-    """This function undertakes the insertion of individual game records into the 'Games' table of the rental company database. 
-    The input is a tuple containing all the essential game attributes like game ID, title, platform, genre, purchase price, and purchase date.
-    """
-
-    connection_to_sql_database=sqlite3.connect('RentalCompany.db')
-    cursor=connection_to_sql_database.cursor()
-    
-    sqlite_insert_record_query="""Insert into Games ('Game id',Title,Platform,Genre,"Purchase Price", "Purchase Date") VALUES (?,?,?,?,?,?)"""
+    Each object in the list represents a unique combination of a game's title and its genre.
+    The rows are sent in one executemany call on the connection given, which is committed by the caller."""
+    insert_query = """INSERT OR IGNORE INTO 'Game Genres' ('Title', 'Genre') VALUES (?,?)"""
     
-    cursor.execute(sqlite_insert_record_query, tuple_games)
-    connection_to_sql_database.commit()
-    connection_to_sql_database.close()
+    connection.executemany(insert_query,((genre.title, genre.genre) for genre in game_genre_text_data))
     
-def insert_all_data_into_sql(game_data):
+def insert_all_data_into_sql(game_data,connection):
     """Efficiently processes a list of game data objects for bulk insertion into the 'Games' table in the database. 
     Each object in the list is a detailed representation of a game, inclusive of its ID, title, platform, genre, and other pertinent details.
     This sql table is used to generate a new sql table which links primary keys to foreign keys.
+    The rows are sent in one executemany call on the connection given, which is committed by the caller.
     """
-    for game in game_data:
-        insert_data_into_sql((game.game_id,game.title,game.platform, game.genre,game.purchase_price,game.purchase_date))
-
-def create_game_rental_dates_table():
-    """This generates a new table called game rental dates through an inner join between the Games table and Games Catalogue table
-        it contains the following columns game id, catalogue index and purchase date."""
-    conn = sqlite3.connect('RentalCompany.db')
-    cursor = conn.cursor()
+    insert_query="""Insert into Games ('Game id',Title,Platform,Genre,"Purchase Price", "Purchase Date") VALUES (?,?,?,?,?,?)"""
     
+    connection.executemany(insert_query,((game.game_id,game.title,game.platform, game.genre,game.purchase_price,game.purchase_date) for game in game_data))
+
+def create_game_rental_dates_table(connection):
+    """This fills the game rental dates table through an inner join between the Games table and Games Catalogue table
+        it contains the following columns game id, catalogue index and purchase date.
+        Games already in the table are left alone, so it only adds the games loaded since it was last run.
+        It runs on the connection given, which is committed by the caller."""
     sql_query = """
-    CREATE TABLE "Game Rental Dates" AS
+    INSERT OR IGNORE INTO "Game Rental Dates" ('Game Id', 'Catalogue Index', 'Purchase Date')
     SELECT 
         Games.'Game Id', 
         'Game Catalogue'.'Catalogue Index', 
@@ -419,33 +546,150 @@ def create_game_rental_dates_table():
         Games.'Purchase Price' = 'Game Catalogue'.'Purchase Price';
     """
     
-    cursor.execute(sql_query)
-    conn.commit()
-    conn.close()
+    connection.execute(sql_query)
+
+def insert_rental_chunk(rental_chunk,connection):
+    """
+    This numbers a chunk of rental objects after the rentals already stored and inserts them
+    into the 'Game Rentals' and 'Rental Periods' tables on the connection given.
+    """
+    first_rental_index=next_rental_index(connection)
+    
+    for position,rental in enumerate(rental_chunk):
+        
+        rental.rental_index=first_rental_index+position
+    
+    insert_all_data_into_game_rentals(rental_chunk,connection)
+    
+    insert_all_data_into_rental_periods(rental_chunk,connection)
+
+def insert_game_chunk(game_chunk,connection):
+    """
+    This inserts a chunk of game objects into the 'Game Catalogue', 'Game Genres' and 'Games' tables
+    on the connection given, and adds the new games to the 'Game Rental Dates' table.
+    """
+    insert_all_data_into_game_catalogue(game_chunk,connection)
+    
+    insert_all_data_into_game_genres(game_chunk,connection)
+    
+    insert_all_data_into_sql(game_chunk,connection)
     
+    create_game_rental_dates_table(connection)
 
-try:
-    """This process add alls the required data to the intialised tables of the rental company database."""
-    insert_all_data_into_game_rentals(rental_text_data)
+def store_chunk(insert_chunk,records,file_name,previous_offset,offset,line_number,checksum):
+    """
+    This stores a chunk of records together with the load state of the file they were read from.
+    It is run inside run_in_transaction, so the records and the new offset are committed together.
+    """
+    connection=get_connection()
+    
+    insert_chunk(records,connection)
+    
+    save_load_state(connection,file_name,previous_offset,offset,line_number,checksum)
+
+def find_file_load_start(file_name):
+    """
+    This returns the byte offset and line number the next load of a text file starts from.
+    It is run inside run_in_transaction, as a file loaded by an older version has its state recorded.
+    """
+    return(find_load_start(get_connection(),file_name))
+
+def load_text_file(file_name,read_records,insert_chunk,chunk_size=INGEST_CHUNK_SIZE,progress=None):
+    """
+    This loads the lines added to a text file since it was last loaded, one chunk of records at a time.
+    It takes the file name, the generator function which reads and cleans its records, the function which
+    inserts a chunk of them, and optionally the chunk size and a function called with the progress after every chunk.
+    Every chunk is stored in its own transaction together with the byte offset reached in the file,
+    so a load which is stopped part way through carries on after the last chunk stored when it is run again.
+    It returns the IngestProgress of the file.
+    """
+    start_offset,start_line=run_in_transaction(find_file_load_start,file_name)
+    
+    ingest_progress=IngestProgress(file_name,start_offset,start_line)
+    
+    previous_offset=start_offset
     
-    insert_all_data_into_rental_periods(rental_text_data)
+    for chunk in chunks(read_records(ingest_progress),chunk_size):
+        
+        offset=ingest_progress.bytes_read
+        
+        run_in_transaction(store_chunk,insert_chunk,chunk,file_name,previous_offset,offset,
+                           ingest_progress.line_number,file_checksum(file_name,offset))
+        
+        previous_offset=offset
+        
+        if progress:
+            progress(ingest_progress)
     
-    insert_all_data_into_game_catalogue(game_text_data)
+    #The lines after the last record kept, if any, are recorded as read too.
+    if ingest_progress.bytes_read!=previous_offset:
+        
+        offset=ingest_progress.bytes_read
+        
+        run_in_transaction(store_chunk,insert_chunk,[],file_name,previous_offset,offset,
+                           ingest_progress.line_number,file_checksum(file_name,offset))
     
-    insert_all_data_into_game_genres(game_text_data)
+    return(ingest_progress)
+
+def bulk_load_rental_company_data(rental_file_name,game_file_name,chunk_size=INGEST_CHUNK_SIZE,progress=None):
+    """
+    This streams the lines added to the rental and game text files since the last load into the rental company database.
+    It takes the names of the two files, optionally the number of records inserted at a time
+    and a function which is called with an IngestProgress object after every chunk.
+    Each chunk is read, cleaned and inserted before the next is read, so the memory used stays the same
+    however long the files are, and each is committed with the offset reached in its file, so running the
+    load again after a crash, or after lines have been added to the files, only stores the lines not yet stored.
+    A ValueError is raised if a file has been rewritten rather than added to since it was loaded.
+    It returns a tuple of the IngestProgress objects of the rental file and the game file.
+    """
+    rental_progress=load_text_file(rental_file_name,read_rental_records,insert_rental_chunk,chunk_size,progress)
     
-    insert_all_data_into_sql(game_text_data)
+    game_progress=load_text_file(game_file_name,read_game_records,insert_game_chunk,chunk_size,progress)
     
-    create_game_rental_dates_table()
-except:
-    pass
+    return(rental_progress,game_progress)
+
+def initialise_database(rental_file_name=RENTAL_FILE_NAME,game_file_name=GAME_FILE_NAME,load_data=True,progress=None):
+    """
+    This creates or upgrades the rental company database and loads the lines added to the text files since the last load.
+    It takes the names of the rental and game files, whether to load them at all and a progress function,
+    which is called with an IngestProgress object after every chunk.
+    It returns the tuple of IngestProgress objects of the two files, or None if no data was loaded.
+    """
+    migrate_schema(get_connection())
+    
+    if load_data:
+        
+        return(bulk_load_rental_company_data(rental_file_name,game_file_name,progress=progress))
 
 
 #function type in game id to return game
-from gameReturn import returning_game
+from gameReturn import returning_game,returning_games
 #function type in customer id and game id to rent game
-from gameRent import can_customer_rent_another_game
+from gameRent import can_customer_rent_another_game,rent_games_to_customers,split_rental_requests,invalid_rental_request_report
 #function type in desired game title and platform to see avaliable games to give customers
 from gameSearch import get_available_games_info
 #function type in budget and month of choice for best game to buy
-from gameSelect import games_to_buy,most_popular_title_for_month_graph
\ No newline at end of file
+from gameSelect import games_to_buy,most_popular_title_for_month_graph
+
+if __name__=="__main__":
+
+    parser=argparse.ArgumentParser(description="Create or upgrade the rental company database and load the text files into it.")
+    parser.add_argument("--database",help="the database file to use")
+    parser.add_argument("--rental-file",default=RENTAL_FILE_NAME,help="the rental records text file")
+    parser.add_argument("--game-file",default=GAME_FILE_NAME,help="the games text file")
+    parser.add_argument("--schema-only",action="store_true",help="only create or upgrade the database")
+    arguments=parser.parse_args()
+
+    if arguments.database:
+
+        set_database_name(arguments.database)
+
+    ingest_progresses=initialise_database(arguments.rental_file,arguments.game_file,not arguments.schema_only,print_progress)
+
+    if ingest_progresses:
+
+        for ingest_progress in ingest_progresses:
+
+            print_ambiguous_dates(ingest_progress)
+
+    print_foreign_key_violations()
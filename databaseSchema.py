@@ -0,0 +1,502 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:36:47 2026
+
+@author: James
+"""
+
+"""
+This module holds the versioned schema of the 'RentalCompany' database.
+The version of a database is stored in its user_version pragma.
+A new database is created straight at the latest version, whilst an existing database
+is upgraded in place one version at a time by the upgrade functions below.
+
+Version 1 is the original schema, where only the 'Game Catalogue' table had a primary key.
+Version 2 adds primary keys to 'Games', 'Game Rentals', 'Rental Periods' and 'Game Rental Dates',
+declares the foreign keys between them and adds the indexes used by the availability and search queries.
+Version 3 adds the 'Open Rentals' table, which holds one row for every rental that has not been returned yet.
+It is kept up to date by triggers on 'Game Rentals' and 'Rental Periods', so every rent and return updates it.
+Version 4 adds the 'Catalogue Search' full text index over the titles, platforms and genres of the catalogue.
+It uses the trigram tokenizer of FTS5 and is kept up to date by triggers on 'Game Catalogue' and 'Game Genres'.
+Version 5 makes the 'Rental Index' of 'Game Rentals' an AUTOINCREMENT key, so a new rental is numbered by the
+database inside its transaction and a rental index is never handed out twice.
+Version 6 adds the 'Subscriptions' table, a copy of the subscription file kept up to date by subscriptionStore.py.
+Version 7 stores the rental start and end dates as year-month-day text instead of day-month-year,
+so they sort in date order, and indexes them along with the month of the rental end date.
+Version 8 adds the 'Load State' table, which records how much of each text file has been loaded,
+so database.py only loads the lines added to a file since the last load.
+Version 9 adds the 'Monthly Rentals' table, which counts the rentals of each title and platform by the month
+and year they ended. It is kept up to date by triggers on 'Rental Periods', 'Game Rentals' and 'Game Rental Dates',
+so the popularity analysis reads a few pre-counted rows instead of the whole rental history.
+Version 10 adds the 'Data Version' table, a single counter raised by triggers on every change to the rental,
+catalogue and genre tables, which tells queryCache.py when the query results it holds are out of date.
+
+The foreign keys declared since version 2 only document how the tables refer to each other, they are not enforced.
+PRAGMA foreign_keys is never turned on, and the sample data holds rentals of game ids missing from 'Games',
+so such rows are kept and reported by count_foreign_key_violations instead of being refused.
+"""
+
+SCHEMA_VERSION=10
+
+CREATE_TABLE_QUERIES=(
+    """CREATE TABLE IF NOT EXISTS Games
+               ("Game Id" INTEGER PRIMARY KEY,
+                Title varchar(20),
+                Platform varchar(20),
+                Genre varchar(20),
+                "Purchase Price" int,
+                "Purchase Date" DATETIME)""",
+    """CREATE TABLE IF NOT EXISTS "Game Rentals"
+               ("Rental Index" INTEGER PRIMARY KEY AUTOINCREMENT,
+                "Customer Id" integer,
+                "Game Id" integer REFERENCES Games("Game Id"))""",
+    """CREATE TABLE IF NOT EXISTS "Rental Periods"
+               ("Rental Index" INTEGER PRIMARY KEY REFERENCES "Game Rentals"("Rental Index"),
+                "Rental Start Date" DATETIME,
+                "Rental End Date" DATETIME)""",
+    """CREATE TABLE IF NOT EXISTS "Game Catalogue"
+               ("Catalogue Index" INTEGER PRIMARY KEY AUTOINCREMENT,
+                Title VARCHAR(20),
+                Platform VARCHAR(20),
+                "Purchase Price" INTEGER,
+                UNIQUE (Platform, Title, "Purchase Price"))""",
+    """CREATE TABLE IF NOT EXISTS "Game Genres"
+               (Title varchar(20),
+                Genre varchar(20),
+                UNIQUE (Title,Genre))""",
+    """CREATE TABLE IF NOT EXISTS "Game Rental Dates"
+               ("Game Id" INTEGER PRIMARY KEY REFERENCES Games("Game Id"),
+                "Catalogue Index" INTEGER REFERENCES "Game Catalogue"("Catalogue Index"),
+                "Purchase Date" DATETIME)""",
+    """CREATE TABLE IF NOT EXISTS "Open Rentals"
+               ("Rental Index" INTEGER PRIMARY KEY REFERENCES "Game Rentals"("Rental Index"),
+                "Game Id" integer,
+                "Customer Id" integer)""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS "Catalogue Search"
+               USING fts5(Title,Platform,Genres,tokenize='trigram')""",
+    """CREATE TABLE IF NOT EXISTS "Subscriptions"
+               ("Customer Id" TEXT PRIMARY KEY,
+                "Subscription Type" varchar(20),
+                "Start Date" DATETIME,
+                "End Date" DATETIME)""",
+    """CREATE TABLE IF NOT EXISTS "Load State"
+               ("File Name" TEXT PRIMARY KEY,
+                "Byte Offset" INTEGER,
+                "Line Number" INTEGER,
+                "Checksum" TEXT,
+                "Loaded At" DATETIME)""",
+    """CREATE TABLE IF NOT EXISTS "Monthly Rentals"
+               ("Month" INTEGER,
+                "Year" INTEGER,
+                Title VARCHAR(20),
+                Platform VARCHAR(20),
+                "Rentals" INTEGER,
+                "First Rental Index" INTEGER,
+                PRIMARY KEY ("Month","Year",Title,Platform))""",
+    """CREATE TABLE IF NOT EXISTS "Data Version"
+               ("Version" INTEGER NOT NULL)""",
+)
+
+CREATE_INDEX_QUERIES=(
+    """CREATE INDEX IF NOT EXISTS "Game Rentals By Game" ON "Game Rentals"("Game Id")""",
+    """CREATE INDEX IF NOT EXISTS "Game Rentals By Customer" ON "Game Rentals"("Customer Id")""",
+    """CREATE INDEX IF NOT EXISTS "Game Catalogue By Title Platform" ON "Game Catalogue"(lower(Title),lower(Platform))""",
+    """CREATE INDEX IF NOT EXISTS "Game Catalogue By Title" ON "Game Catalogue"(Title)""",
+    """CREATE INDEX IF NOT EXISTS "Game Rental Dates By Catalogue Index" ON "Game Rental Dates"("Catalogue Index")""",
+    """CREATE INDEX IF NOT EXISTS "Open Rentals By Game" ON "Open Rentals"("Game Id")""",
+    """CREATE INDEX IF NOT EXISTS "Open Rentals By Customer" ON "Open Rentals"("Customer Id")""",
+    """CREATE INDEX IF NOT EXISTS "Rental Periods By Start Date" ON "Rental Periods"("Rental Start Date")""",
+    """CREATE INDEX IF NOT EXISTS "Rental Periods By End Date" ON "Rental Periods"("Rental End Date")""",
+    """CREATE INDEX IF NOT EXISTS "Rental Periods By End Month" ON "Rental Periods"(substr("Rental End Date",6,2))""",
+)
+
+#A rental is open while its rental end date is empty, the same rule the rental and return code has always used.
+CREATE_TRIGGER_QUERIES=(
+    """CREATE TRIGGER IF NOT EXISTS "Open Rental On Period Insert" AFTER INSERT ON "Rental Periods"
+               WHEN NEW."Rental End Date" IS NULL OR NEW."Rental End Date"=''
+               BEGIN
+                   INSERT OR REPLACE INTO "Open Rentals" ("Rental Index","Game Id","Customer Id")
+                   SELECT "Rental Index","Game Id","Customer Id" FROM "Game Rentals" WHERE "Rental Index"=NEW."Rental Index";
+               END""",
+    """CREATE TRIGGER IF NOT EXISTS "Open Rental On Period Update" AFTER UPDATE OF "Rental Index","Rental End Date" ON "Rental Periods"
+               BEGIN
+                   DELETE FROM "Open Rentals" WHERE "Rental Index"=OLD."Rental Index";
+                   INSERT OR REPLACE INTO "Open Rentals" ("Rental Index","Game Id","Customer Id")
+                   SELECT "Rental Index","Game Id","Customer Id" FROM "Game Rentals"
+                   WHERE "Rental Index"=NEW."Rental Index" AND (NEW."Rental End Date" IS NULL OR NEW."Rental End Date"='');
+               END""",
+    """CREATE TRIGGER IF NOT EXISTS "Open Rental On Period Delete" AFTER DELETE ON "Rental Periods"
+               BEGIN
+                   DELETE FROM "Open Rentals" WHERE "Rental Index"=OLD."Rental Index";
+               END""",
+    """CREATE TRIGGER IF NOT EXISTS "Open Rental On Rental Insert" AFTER INSERT ON "Game Rentals"
+               BEGIN
+                   INSERT OR REPLACE INTO "Open Rentals" ("Rental Index","Game Id","Customer Id")
+                   SELECT NEW."Rental Index",NEW."Game Id",NEW."Customer Id" FROM "Rental Periods"
+                   WHERE "Rental Index"=NEW."Rental Index" AND ("Rental End Date" IS NULL OR "Rental End Date"='');
+               END""",
+    """CREATE TRIGGER IF NOT EXISTS "Open Rental On Rental Update" AFTER UPDATE OF "Rental Index","Game Id","Customer Id" ON "Game Rentals"
+               BEGIN
+                   DELETE FROM "Open Rentals" WHERE "Rental Index"=OLD."Rental Index";
+                   INSERT OR REPLACE INTO "Open Rentals" ("Rental Index","Game Id","Customer Id")
+                   SELECT NEW."Rental Index",NEW."Game Id",NEW."Customer Id" FROM "Rental Periods"
+                   WHERE "Rental Index"=NEW."Rental Index" AND ("Rental End Date" IS NULL OR "Rental End Date"='');
+               END""",
+    """CREATE TRIGGER IF NOT EXISTS "Open Rental On Rental Delete" AFTER DELETE ON "Game Rentals"
+               BEGIN
+                   DELETE FROM "Open Rentals" WHERE "Rental Index"=OLD."Rental Index";
+               END""",
+    #The rowid of each search row is the catalogue index of the game it describes.
+    """CREATE TRIGGER IF NOT EXISTS "Catalogue Search On Catalogue Insert" AFTER INSERT ON "Game Catalogue"
+               BEGIN
+                   INSERT INTO "Catalogue Search" (rowid,Title,Platform,Genres)
+                   VALUES (NEW."Catalogue Index",NEW.Title,NEW.Platform,
+                           (SELECT group_concat(Genre,'|') FROM "Game Genres" WHERE Title=NEW.Title));
+               END""",
+    """CREATE TRIGGER IF NOT EXISTS "Catalogue Search On Catalogue Update" AFTER UPDATE ON "Game Catalogue"
+               BEGIN
+                   DELETE FROM "Catalogue Search" WHERE rowid=OLD."Catalogue Index";
+                   INSERT INTO "Catalogue Search" (rowid,Title,Platform,Genres)
+                   VALUES (NEW."Catalogue Index",NEW.Title,NEW.Platform,
+                           (SELECT group_concat(Genre,'|') FROM "Game Genres" WHERE Title=NEW.Title));
+               END""",
+    """CREATE TRIGGER IF NOT EXISTS "Catalogue Search On Catalogue Delete" AFTER DELETE ON "Game Catalogue"
+               BEGIN
+                   DELETE FROM "Catalogue Search" WHERE rowid=OLD."Catalogue Index";
+               END""",
+    """CREATE TRIGGER IF NOT EXISTS "Catalogue Search On Genre Insert" AFTER INSERT ON "Game Genres"
+               BEGIN
+                   UPDATE "Catalogue Search" SET Genres=(SELECT group_concat(Genre,'|') FROM "Game Genres" WHERE Title=NEW.Title)
+                   WHERE rowid IN (SELECT "Catalogue Index" FROM "Game Catalogue" WHERE Title=NEW.Title);
+               END""",
+    """CREATE TRIGGER IF NOT EXISTS "Catalogue Search On Genre Delete" AFTER DELETE ON "Game Genres"
+               BEGIN
+                   UPDATE "Catalogue Search" SET Genres=(SELECT group_concat(Genre,'|') FROM "Game Genres" WHERE Title=OLD.Title)
+                   WHERE rowid IN (SELECT "Catalogue Index" FROM "Game Catalogue" WHERE Title=OLD.Title);
+               END""",
+)
+
+#This counts the closed rentals picked out by a condition, by the month and year they ended and the title and platform rented.
+#The first rental index of each group orders titles with the same count by when they were first rented.
+MONTHLY_RENTAL_GROUPS_QUERY="""
+    SELECT CAST(substr(RP."Rental End Date",6,2) AS INTEGER) AS "Month",
+           CAST(substr(RP."Rental End Date",1,4) AS INTEGER) AS "Year",
+           GC.Title AS Title,GC.Platform AS Platform,
+           COUNT(*) AS "Rentals",MIN(RP."Rental Index") AS "First Rental Index"
+    FROM "Rental Periods" AS RP
+    INNER JOIN "Game Rentals" AS GR ON GR."Rental Index"=RP."Rental Index"
+    INNER JOIN "Game Rental Dates" AS GRD ON GRD."Game Id"=GR."Game Id"
+    INNER JOIN "Game Catalogue" AS GC ON GC."Catalogue Index"=GRD."Catalogue Index"
+    WHERE RP."Rental End Date"<>'' AND {condition}
+    GROUP BY 1,2,3,4
+    """
+
+#This adds the rentals picked out by a condition to the 'Monthly Rentals' table.
+ADD_MONTHLY_RENTALS_QUERY="""
+                   INSERT INTO "Monthly Rentals" ("Month","Year",Title,Platform,"Rentals","First Rental Index")
+                   SELECT * FROM ({groups}) WHERE 1
+                   ON CONFLICT ("Month","Year",Title,Platform) DO UPDATE SET
+                       "Rentals"="Rentals"+excluded."Rentals",
+                       "First Rental Index"=MIN("First Rental Index",excluded."First Rental Index");"""
+
+#This takes the rentals picked out by a condition away from the 'Monthly Rentals' table, whilst they are still stored.
+#A group whose first rental is taken away has its first rental index found again from the rentals left.
+REMOVE_MONTHLY_RENTALS_QUERY="""
+                   UPDATE "Monthly Rentals" SET
+                       "Rentals"="Monthly Rentals"."Rentals"-G."Rentals",
+                       "First Rental Index"=CASE WHEN "Monthly Rentals"."First Rental Index"<G."First Rental Index"
+                                                 THEN "Monthly Rentals"."First Rental Index" END
+                   FROM ({groups}) AS G
+                   WHERE "Monthly Rentals"."Month"=G."Month" AND "Monthly Rentals"."Year"=G."Year"
+                   AND "Monthly Rentals".Title=G.Title AND "Monthly Rentals".Platform=G.Platform;
+                   DELETE FROM "Monthly Rentals" WHERE "Rentals"<=0;
+                   UPDATE "Monthly Rentals" SET "First Rental Index"=(
+                       SELECT MIN(RP."Rental Index")
+                       FROM "Rental Periods" AS RP
+                       INNER JOIN "Game Rentals" AS GR ON GR."Rental Index"=RP."Rental Index"
+                       INNER JOIN "Game Rental Dates" AS GRD ON GRD."Game Id"=GR."Game Id"
+                       INNER JOIN "Game Catalogue" AS GC ON GC."Catalogue Index"=GRD."Catalogue Index"
+                       WHERE GC.Title="Monthly Rentals".Title AND GC.Platform="Monthly Rentals".Platform
+                       AND RP."Rental End Date">=printf('%04d-%02d-',"Monthly Rentals"."Year","Monthly Rentals"."Month")
+                       AND RP."Rental End Date"<printf('%04d-%02d.',"Monthly Rentals"."Year","Monthly Rentals"."Month")
+                       AND NOT ({condition}))
+                   WHERE "First Rental Index" IS NULL;"""
+
+#Each trigger is made up of its name, when it fires, whether it adds or removes rentals, the condition picking them out
+#and a WHEN clause which skips the trigger when no closed rental can be affected, such as when a rental is opened.
+#Rentals are removed before a change, while the rows they come from can still be read, and added after it.
+MONTHLY_RENTALS_TRIGGERS=(
+    ("On Period Insert",'AFTER INSERT ON "Rental Periods"',ADD_MONTHLY_RENTALS_QUERY,'RP."Rental Index"=NEW."Rental Index"',
+     'WHEN NEW."Rental End Date"<>\'\''),
+    ("Before Period Update",'BEFORE UPDATE OF "Rental Index","Rental End Date" ON "Rental Periods"',REMOVE_MONTHLY_RENTALS_QUERY,'RP."Rental Index"=OLD."Rental Index"',
+     'WHEN OLD."Rental End Date"<>\'\''),
+    ("On Period Update",'AFTER UPDATE OF "Rental Index","Rental End Date" ON "Rental Periods"',ADD_MONTHLY_RENTALS_QUERY,'RP."Rental Index"=NEW."Rental Index"',
+     'WHEN NEW."Rental End Date"<>\'\''),
+    ("Before Period Delete",'BEFORE DELETE ON "Rental Periods"',REMOVE_MONTHLY_RENTALS_QUERY,'RP."Rental Index"=OLD."Rental Index"',
+     'WHEN OLD."Rental End Date"<>\'\''),
+    ("On Rental Insert",'AFTER INSERT ON "Game Rentals"',ADD_MONTHLY_RENTALS_QUERY,'GR."Rental Index"=NEW."Rental Index"',
+     'WHEN EXISTS (SELECT 1 FROM "Rental Periods" WHERE "Rental Index"=NEW."Rental Index" AND "Rental End Date"<>\'\')'),
+    ("Before Rental Update",'BEFORE UPDATE OF "Rental Index","Game Id" ON "Game Rentals"',REMOVE_MONTHLY_RENTALS_QUERY,'GR."Rental Index"=OLD."Rental Index"',
+     'WHEN EXISTS (SELECT 1 FROM "Rental Periods" WHERE "Rental Index"=OLD."Rental Index" AND "Rental End Date"<>\'\')'),
+    ("On Rental Update",'AFTER UPDATE OF "Rental Index","Game Id" ON "Game Rentals"',ADD_MONTHLY_RENTALS_QUERY,'GR."Rental Index"=NEW."Rental Index"',
+     'WHEN EXISTS (SELECT 1 FROM "Rental Periods" WHERE "Rental Index"=NEW."Rental Index" AND "Rental End Date"<>\'\')'),
+    ("Before Rental Delete",'BEFORE DELETE ON "Game Rentals"',REMOVE_MONTHLY_RENTALS_QUERY,'GR."Rental Index"=OLD."Rental Index"',
+     'WHEN EXISTS (SELECT 1 FROM "Rental Periods" WHERE "Rental Index"=OLD."Rental Index" AND "Rental End Date"<>\'\')'),
+    ("On Game Insert",'AFTER INSERT ON "Game Rental Dates"',ADD_MONTHLY_RENTALS_QUERY,'GR."Game Id"=NEW."Game Id"',''),
+    ("Before Game Update",'BEFORE UPDATE OF "Game Id","Catalogue Index" ON "Game Rental Dates"',REMOVE_MONTHLY_RENTALS_QUERY,'GR."Game Id"=OLD."Game Id"',''),
+    ("On Game Update",'AFTER UPDATE OF "Game Id","Catalogue Index" ON "Game Rental Dates"',ADD_MONTHLY_RENTALS_QUERY,'GR."Game Id"=NEW."Game Id"',''),
+    ("Before Game Delete",'BEFORE DELETE ON "Game Rental Dates"',REMOVE_MONTHLY_RENTALS_QUERY,'GR."Game Id"=OLD."Game Id"',''),
+)
+
+CREATE_TRIGGER_QUERIES+=tuple(f"""CREATE TRIGGER IF NOT EXISTS "Monthly Rentals {name}" {event} {when}
+               BEGIN{query.format(groups=MONTHLY_RENTAL_GROUPS_QUERY.format(condition=condition),condition=condition)}
+               END""" for name,event,query,condition,when in MONTHLY_RENTALS_TRIGGERS)
+
+#These are the tables the analytics queries read, every change to them raises the data version.
+#'Open Rentals', 'Catalogue Search' and 'Monthly Rentals' are only changed along with one of them.
+DATA_VERSION_TABLES=("Game Rentals","Rental Periods","Game Rental Dates","Game Catalogue","Game Genres","Games")
+
+CREATE_TRIGGER_QUERIES+=tuple(f"""CREATE TRIGGER IF NOT EXISTS "Data Version On {table_name} {event.title()}" AFTER {event} ON "{table_name}"
+               BEGIN
+                   UPDATE "Data Version" SET "Version"="Version"+1;
+               END""" for table_name in DATA_VERSION_TABLES for event in ("INSERT","UPDATE","DELETE"))
+
+#This selects the counts of every closed rental from the rental history, it is used to fill and check the 'Monthly Rentals' table.
+SELECT_MONTHLY_RENTALS_QUERY=MONTHLY_RENTAL_GROUPS_QUERY.format(condition="1")
+
+#This selects every open rental from the rental history, it is used to fill and check the 'Open Rentals' table.
+SELECT_OPEN_RENTALS_QUERY="""
+    SELECT GR."Rental Index",GR."Game Id",GR."Customer Id"
+    FROM "Rental Periods" AS RP
+    INNER JOIN "Game Rentals" AS GR ON GR."Rental Index"=RP."Rental Index"
+    WHERE RP."Rental End Date" IS NULL OR RP."Rental End Date"=''
+    """
+
+#These are the tables whose version 1 definitions had no primary key, with the columns copied across.
+VERSION_1_REBUILT_TABLES=(
+    ("Games",'"Game Id",Title,Platform,Genre,"Purchase Price","Purchase Date"'),
+    ("Game Rentals",'"Rental Index","Customer Id","Game Id"'),
+    ("Rental Periods",'"Rental Index","Rental Start Date","Rental End Date"'),
+    ("Game Rental Dates",'"Game Id","Catalogue Index","Purchase Date"'),
+)
+
+def get_schema_version(connection):
+    """
+    This reads the schema version of the database behind the connection.
+    A database with no version recorded is version 1 if it already holds the original tables,
+    otherwise it is a new database and 0 is returned.
+    """
+    version=connection.execute("PRAGMA user_version").fetchone()[0]
+
+    if version==0 and table_exists(connection,"Games"):
+
+        version=1
+
+    return(version)
+
+def table_exists(connection,table_name):
+    """
+    This checks whether a table with the given name exists in the database.
+    It returns a boolean expression, True if the table exists.
+    """
+    cursor=connection.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name=?",(table_name,))
+
+    return(cursor.fetchone()[0]>0)
+
+def count_foreign_key_violations(connection):
+    """
+    This counts the rows which refer to a row missing from another table through one of the declared foreign keys.
+    It returns a dictionary of the number of rows keyed on a tuple of the table and the table it refers to.
+    """
+    cursor=connection.execute('SELECT "table",parent,COUNT(*) FROM pragma_foreign_key_check GROUP BY "table",parent')
+
+    return({(table_name,parent_table):row_count for table_name,parent_table,row_count in cursor.fetchall()})
+
+def create_schema(connection):
+    """
+    This creates every table, index and trigger of the latest schema version that does not exist yet.
+    """
+    for query in CREATE_TABLE_QUERIES+CREATE_INDEX_QUERIES+CREATE_TRIGGER_QUERIES:
+
+        connection.execute(query)
+
+def create_data_version(connection):
+    """
+    This adds the single row of the 'Data Version' table, starting at 0, if the table is empty.
+    """
+    connection.execute('INSERT INTO "Data Version" ("Version") SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM "Data Version")')
+
+def upgrade_to_version_2(connection):
+    """
+    This upgrades a version 1 database in place.
+    SQLite cannot add a primary key to an existing table, so each table without one is renamed,
+    recreated with its keys and refilled from the renamed copy, which is then dropped.
+    Rows repeating a primary key, left behind by reloading the text files more than once, are dropped
+    so that only the first copy of each is kept.
+    """
+    old_tables=[]
+
+    for table_name,columns in VERSION_1_REBUILT_TABLES:
+
+        if table_exists(connection,table_name):
+
+            connection.execute(f'ALTER TABLE "{table_name}" RENAME TO "{table_name} v1"')
+
+            old_tables.append((table_name,columns))
+
+    create_schema(connection)
+
+    for table_name,columns in old_tables:
+
+        connection.execute(f'INSERT OR IGNORE INTO "{table_name}" ({columns}) SELECT {columns} FROM "{table_name} v1" ORDER BY rowid')
+
+        connection.execute(f'DROP TABLE "{table_name} v1"')
+
+def upgrade_to_version_3(connection):
+    """
+    This upgrades a version 2 database in place by adding the 'Open Rentals' table and its triggers,
+    then filling the table from the rental history already stored.
+    """
+    create_schema(connection)
+
+    connection.execute(f'INSERT OR REPLACE INTO "Open Rentals" ("Rental Index","Game Id","Customer Id") {SELECT_OPEN_RENTALS_QUERY}')
+
+def upgrade_to_version_4(connection):
+    """
+    This upgrades a version 3 database in place by adding the 'Catalogue Search' index and its triggers,
+    then filling the index from the catalogue and genres already stored.
+    """
+    create_schema(connection)
+
+    connection.execute('DELETE FROM "Catalogue Search"')
+
+    connection.execute("""INSERT INTO "Catalogue Search" (rowid,Title,Platform,Genres)
+                          SELECT GC."Catalogue Index",GC.Title,GC.Platform,
+                                 (SELECT group_concat(Genre,'|') FROM "Game Genres" AS GG WHERE GG.Title=GC.Title)
+                          FROM "Game Catalogue" AS GC""")
+
+def upgrade_to_version_5(connection):
+    """
+    This upgrades a version 4 database in place by rebuilding 'Game Rentals' with an AUTOINCREMENT key.
+    The rentals are copied into a new table which then replaces the old one. The legacy alter table
+    setting stops SQLite rewriting the triggers of 'Rental Periods' while the old table is gone.
+    The indexes and triggers dropped with the old table are created again and the open rentals
+    are refilled, since dropping a table does not run its delete triggers.
+    """
+    connection.execute("PRAGMA legacy_alter_table=ON")
+
+    connection.execute(CREATE_TABLE_QUERIES[1].replace('"Game Rentals"','"Game Rentals v5"',1))
+
+    connection.execute('INSERT INTO "Game Rentals v5" ("Rental Index","Customer Id","Game Id") SELECT "Rental Index","Customer Id","Game Id" FROM "Game Rentals"')
+
+    connection.execute('DROP TABLE "Game Rentals"')
+
+    connection.execute('ALTER TABLE "Game Rentals v5" RENAME TO "Game Rentals"')
+
+    connection.execute("PRAGMA legacy_alter_table=OFF")
+
+    create_schema(connection)
+
+    connection.execute(f'INSERT OR REPLACE INTO "Open Rentals" ("Rental Index","Game Id","Customer Id") {SELECT_OPEN_RENTALS_QUERY}')
+
+def upgrade_to_version_6(connection):
+    """
+    This upgrades a version 5 database in place by adding the 'Subscriptions' table.
+    The table is filled the first time the subscriptions are loaded.
+    """
+    create_schema(connection)
+
+#Rewrites a day-month-year date column as year-month-day, leaving empty dates and dates in any other format alone.
+CONVERT_RENTAL_DATE_QUERY="""UPDATE "Rental Periods"
+               SET "{column}"=substr("{column}",7,4)||'-'||substr("{column}",4,2)||'-'||substr("{column}",1,2)
+               WHERE "{column}" GLOB '[0-9][0-9]-[0-9][0-9]-[0-9][0-9][0-9][0-9]'"""
+
+def upgrade_to_version_7(connection):
+    """
+    This upgrades a version 6 database in place by rewriting the rental start and end dates
+    as year-month-day text and adding the indexes on them.
+    A rental stays open through the upgrade, since an empty end date is left as it is.
+    """
+    for column in ("Rental Start Date","Rental End Date"):
+
+        connection.execute(CONVERT_RENTAL_DATE_QUERY.format(column=column))
+
+    create_schema(connection)
+
+#The text files loaded by every version before 8, with the table that holds rows once each has been loaded.
+LEGACY_LOADED_FILES=(("Customer Rental Data.txt","Game Rentals"),("Business Games_data.txt","Games"))
+
+def upgrade_to_version_8(connection):
+    """
+    This upgrades a version 7 database in place by adding the 'Load State' table.
+    Older versions loaded the whole of each text file in one transaction, so a file whose table holds rows
+    was loaded in full. Such a file is recorded without an offset, which the next load fills in
+    with the size of the file, instead of loading it a second time.
+    """
+    create_schema(connection)
+
+    for file_name,table_name in LEGACY_LOADED_FILES:
+
+        if connection.execute(f'SELECT EXISTS (SELECT 1 FROM "{table_name}")').fetchone()[0]:
+
+            connection.execute('INSERT OR IGNORE INTO "Load State" ("File Name") VALUES (?)',(file_name,))
+
+def upgrade_to_version_9(connection):
+    """
+    This upgrades a version 8 database in place by adding the 'Monthly Rentals' table and its triggers,
+    and filling it from the rental history.
+    The table is emptied first, since the triggers created by an earlier upgrade step may already have added
+    rows to it, such as those fired by the rewrite of the rental dates in version 7.
+    """
+    create_schema(connection)
+
+    connection.execute('DELETE FROM "Monthly Rentals"')
+
+    connection.execute(f'INSERT INTO "Monthly Rentals" {SELECT_MONTHLY_RENTALS_QUERY}')
+
+def upgrade_to_version_10(connection):
+    """
+    This upgrades a version 9 database in place by adding the 'Data Version' table and its triggers.
+    """
+    create_schema(connection)
+
+SCHEMA_UPGRADES={
+    2:upgrade_to_version_2,
+    3:upgrade_to_version_3,
+    4:upgrade_to_version_4,
+    5:upgrade_to_version_5,
+    6:upgrade_to_version_6,
+    7:upgrade_to_version_7,
+    8:upgrade_to_version_8,
+    9:upgrade_to_version_9,
+    10:upgrade_to_version_10,
+}
+
+def migrate_schema(connection):
+    """
+    This brings the database behind the connection up to the latest schema version.
+    A new database is created at the latest version, an older one is upgraded one version at a time.
+    All of the work happens in one transaction, so a failed upgrade leaves the database as it was.
+    It returns the schema version the database had before it was migrated.
+    """
+    with connection:
+
+        connection.execute("BEGIN IMMEDIATE")
+
+        version=get_schema_version(connection)
+
+        if version==0:
+
+            create_schema(connection)
+
+        else:
+
+            for new_version in range(version+1,SCHEMA_VERSION+1):
+
+                SCHEMA_UPGRADES[new_version](connection)
+
+        create_data_version(connection)
+
+        connection.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    return(version)
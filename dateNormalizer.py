@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:44:36 2026
+
+@author: James
+"""
+from collections import Counter
+from datetime import datetime
+from functools import lru_cache
+
+"""
+This module cleans the dates found in the rental text files, which are written in many different formats.
+Every date is rewritten as day-month-year, exactly as GameRentals._format_date has always done:
+the formats below are tried in order and the first one that reads the date wins.
+
+Trying up to twelve formats for every date, with an exception raised for every miss, is slow,
+so the DateNormalizer class
+   - remembers the result for every date string it has seen, since the same dates repeat throughout a file,
+   - only tries the formats with the same separator and year position as the date, falling back to
+     every format for outliers which do not split that way,
+   - works out which format most of the dates in a column use, for the ingest report,
+   - and records the rows whose date could be read by more than one format as a different day,
+     so those rows can be checked by hand.
+The dominant format is reported rather than tried first, since reading an ambiguous date with it
+would change the day stored compared with the order below.
+
+The cleaned dates are stored in the database as year-month-day (ISO 8601) text, which sorts in date order,
+so the database can index them and answer month and date range queries itself.
+"""
+
+DATE_FORMATS=("%d/%m/%Y", "%d/%Y/%m", "%Y/%d/%m", "%m/%d/%Y", "%m/%Y/%d", "%Y/%m/%d",
+              "%m-%d-%Y", "%d-%Y-%m", "%Y-%d-%m", "%d-%m-%Y", "%m-%Y-%d", "%Y-%m-%d")
+
+OUTPUT_DATE_FORMAT="%d-%m-%Y"
+
+STORAGE_DATE_FORMAT="%Y-%m-%d"
+
+#Only the first rows with an ambiguous date are kept, so a very large file cannot fill the memory with them.
+AMBIGUOUS_ROWS_KEPT=1000
+
+def read_date(date,date_format):
+    """
+    This reads a date string with one format.
+    It returns a datetime object, or None if the date is not written in that format.
+    """
+    try:
+
+        return(datetime.strptime(date,date_format))
+
+    except ValueError:
+
+        return(None)
+
+@lru_cache(maxsize=None)
+def to_storage_date(date):
+    """
+    This rewrites a cleaned day-month-year date in the year-month-day format the database stores dates in.
+    It takes a date string and returns a string, an empty date is returned unchanged.
+    """
+    if date:
+
+        return(datetime.strptime(date,OUTPUT_DATE_FORMAT).strftime(STORAGE_DATE_FORMAT))
+
+    return(date)
+
+class DateNormalizer:
+    """
+    Rewrites the dates of one column of a text file in the day-month-year format.
+
+    The result for each distinct date string is cached, so a repeated date is never parsed twice,
+    and a new date is only tried against the formats that could read it, in the order of DATE_FORMATS,
+    which keeps every result identical to trying the formats one after another.
+    """
+    def __init__(self,output_format=OUTPUT_DATE_FORMAT):
+
+        self.output_format=output_format
+
+        self.dominant_format=None
+
+        self.normalized_dates={}
+
+        self.ambiguous_dates=set()
+
+        self.formats_by_shape={}
+
+        self.ambiguous_rows=[]
+
+        self.ambiguous_row_count=0
+
+    def infer_dominant_format(self,sample_dates):
+        """
+        This works out the format used by most of a sample of dates from the column.
+        It takes a list of date strings, ignoring empty ones, and returns the first format in
+        DATE_FORMATS able to read the most of them. None is returned if no date could be read.
+        """
+        format_counts=Counter()
+
+        for date in set(sample_dates):
+
+            if date:
+
+                for date_format in self.candidate_formats(date):
+
+                    if read_date(date,date_format) is not None:
+
+                        format_counts[date_format]+=1
+
+        if format_counts:
+
+            self.dominant_format=format_counts.most_common(1)[0][0]
+
+        return(self.dominant_format)
+
+    def normalize(self,date,row=None):
+        """
+        This rewrites a date in the output format.
+        It takes a date string or datetime object, and optionally the row of the file it came from,
+        which is counted, and recorded if fewer than AMBIGUOUS_ROWS_KEPT have been, if the date is ambiguous.
+        It returns the rewritten date as a string.
+        A ValueError is raised for a date string no format can read and a TypeError for any other value.
+        """
+        if isinstance(date,str):
+
+            normalized_date=self.normalized_dates.get(date)
+
+            if normalized_date is None:
+
+                normalized_date=self.normalize_new_date(date)
+
+            if row is not None and date in self.ambiguous_dates:
+
+                self.ambiguous_row_count+=1
+
+                if len(self.ambiguous_rows)<AMBIGUOUS_ROWS_KEPT:
+
+                    self.ambiguous_rows.append((row,date))
+
+            return(normalized_date)
+
+        elif isinstance(date,datetime):
+
+            return(date.strftime(self.output_format))
+
+        else:
+
+            raise TypeError("Date must be a string or a datetime object")
+
+    def normalize_new_date(self,date):
+        """
+        This reads a date string which has not been seen before and caches the result.
+        Only the formats that could possibly read the string are tried, in the order of DATE_FORMATS,
+        so the result is the same as trying every format one after another.
+        """
+        candidate_formats=self.candidate_formats(date)
+
+        parsed_date=None
+
+        for position,date_format in enumerate(candidate_formats):
+
+            parsed_date=read_date(date,date_format)
+
+            if parsed_date is not None:
+
+                break
+
+        if parsed_date is None:
+
+            raise ValueError(f"Date format for '{date}' is not recognized")
+
+        for date_format in candidate_formats[position+1:]:
+
+            other_date=read_date(date,date_format)
+
+            if other_date is not None and other_date!=parsed_date:
+
+                self.ambiguous_dates.add(date)
+
+                break
+
+        normalized_date=parsed_date.strftime(self.output_format)
+
+        self.normalized_dates[date]=normalized_date
+
+        return(normalized_date)
+
+    def candidate_formats(self,date):
+        """
+        This picks out the formats which could read a date string, keeping the order of DATE_FORMATS.
+        A format can only read a date written with its separator and with the four digit year in the
+        same place, so a date such as 24/10/2023 is only tried against the formats ending in /%Y.
+        Dates that do not split into three parts this way are outliers and are tried against every format.
+        The candidates are cached for each shape of date.
+        """
+        separator="/" if "/" in date else "-"
+
+        date_parts=date.split(separator)
+
+        year_positions=[position for position,part in enumerate(date_parts) if len(part)==4]
+
+        if len(date_parts)!=3 or len(year_positions)!=1 or ("/" in date and "-" in date):
+
+            return(DATE_FORMATS)
+
+        date_shape=(separator,year_positions[0])
+
+        candidate_formats=self.formats_by_shape.get(date_shape)
+
+        if candidate_formats is None:
+
+            candidate_formats=tuple(date_format for date_format in DATE_FORMATS
+                                    if date_shape[0] in date_format
+                                    and date_format.split(date_shape[0]).index("%Y")==date_shape[1])
+
+            self.formats_by_shape[date_shape]=candidate_formats
+
+        return(candidate_formats)
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 12:41:30 2026
+
+@author: James
+"""
+import argparse
+from connectionManager import get_connection
+from databaseSchema import migrate_schema
+
+"""
+This module holds the checking, rebuilding and command line code shared by the tables which are
+kept up to date by triggers, such as 'Open Rentals' and 'Monthly Rentals'.
+Each of those modules supplies the table name, its columns and the query which works the rows out
+from the rental history, and this module does the rest.
+"""
+
+def find_table_differences(table_name,columns,select_query):
+    """
+    This compares a trigger maintained table with the rows its select query works out.
+    It returns a tuple of two lists of row tuples.
+    The first list holds the rows missing from the table, the second the rows in the table
+    which do not match the select query.
+    """
+    cursor=get_connection().cursor()
+
+    cursor.execute(f"""{select_query}
+        EXCEPT
+        SELECT {columns} FROM "{table_name}"
+        """)
+
+    missing_rows=cursor.fetchall()
+
+    cursor.execute(f"""
+        SELECT {columns} FROM "{table_name}"
+        EXCEPT
+        {select_query}
+        """)
+
+    unexpected_rows=cursor.fetchall()
+
+    return(missing_rows,unexpected_rows)
+
+def verify_table(table_name,columns,select_query,match_description,difference_description):
+    """
+    This checks that a trigger maintained table agrees with the rows its select query works out.
+    The difference description is formatted with the number of missing rows and then the number of unexpected rows.
+    It returns a tuple made up of a boolean and a string, the boolean is True if they agree
+    and the string describes any differences found.
+    """
+    missing_rows,unexpected_rows=find_table_differences(table_name,columns,select_query)
+
+    tables_agree=(len(missing_rows)==0 and len(unexpected_rows)==0)
+
+    description=match_description
+
+    if tables_agree==False:
+
+        description=difference_description.format(len(missing_rows),len(unexpected_rows))
+
+    return(tables_agree,description)
+
+def rebuild_table(table_name,columns,select_query):
+    """
+    This empties a trigger maintained table and fills it again from its select query.
+    It returns the number of rows stored.
+    """
+    connection=get_connection()
+
+    with connection:
+
+        connection.execute(f'DELETE FROM "{table_name}"')
+
+        cursor=connection.execute(f'INSERT INTO "{table_name}" ({columns}) {select_query}')
+
+    return(cursor.rowcount)
+
+def run_table_command(table_description,verify,rebuild,rebuilt_description):
+    """
+    This reads the verify or rebuild command from the command line and runs it against the database.
+    The rebuilt description is formatted with the number of rows stored by the rebuild.
+    """
+    parser=argparse.ArgumentParser(description=f"Check or rebuild the {table_description} table of the rental company database.")
+    parser.add_argument("command",choices=["verify","rebuild"])
+    arguments=parser.parse_args()
+
+    migrate_schema(get_connection())
+
+    if arguments.command=="verify":
+
+        print(verify()[1])
+
+    else:
+
+        print(rebuilt_description.format(rebuild()))
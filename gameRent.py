@@ -4,28 +4,30 @@ Created on Fri Nov 10 20:25:19 2023
 
 @author: James
 """
-from gameReturn import find_rental_periods_for_game,is_game_hired_out
+from gameReturn import game_hire_status,hire_status_from_open_rentals,canonical_id
+import json
 from datetime import *
-import sqlite3
+from connectionManager import get_connection,run_in_transaction
 import subscriptionManager_v11
 from subscriptionManager_v11 import *
+from subscriptionStore import get_subscriptions
 
 def insert_new_data_into_game_rentals(game_rental_data):
     """
-    Same function as in database.py file.
     This function inserts new rental entries into the game rental table 
     within the rental company database.
     It takes paramater which is a tuple object as input, 
-    this tuple consists of the rental index value, customer id and game id.
+    this tuple consists of the customer id and game id.
+    The rental index is numbered by the database and returned.
+    The insert is committed by the transaction it is called in.
     """
-    connection_to_sql_database=sqlite3.connect('RentalCompany.db')
-    cursor=connection_to_sql_database.cursor()
+    connection_to_sql_database=get_connection()
 
-    sqlite_insert_record_query="""Insert into 'Game Rentals' ('Rental Index','Customer Id','Game Id') VALUES (?,?,?)"""
+    sqlite_insert_record_query="""Insert into 'Game Rentals' ('Customer Id','Game Id') VALUES (?,?)"""
+    
+    cursor=connection_to_sql_database.execute(sqlite_insert_record_query,game_rental_data)
     
-    connection_to_sql_database.execute(sqlite_insert_record_query,game_rental_data)
-    connection_to_sql_database.commit()
-    connection_to_sql_database.close()
+    return(cursor.lastrowid)
     
 def insert_new_data_into_rental_periods(rental_period_data):
     """
@@ -34,40 +36,24 @@ def insert_new_data_into_rental_periods(rental_period_data):
     within the rental company database.
     It takes a paramater which is a tuple object as input, 
     this tuple consists of the rental index value, rental start date and rental end date.
+    The insert is committed by the transaction it is called in.
     """
-    connection = sqlite3.connect('RentalCompany.db')
-    cursor = connection.cursor()
+    connection = get_connection()
 
     insert_query = """INSERT INTO 'Rental Periods' ('Rental Index', 'Rental Start Date', 'Rental End Date') VALUES (?,?,?)"""
     
-    cursor.execute(insert_query, rental_period_data)
-    connection.commit()
-    connection.close()
-
-def latest_customer_index():
-    """
-    This function look in the game rental table for the maximum rental index value.
-    It returns this value.
-    """
-    connection = sqlite3.connect('RentalCompany.db')
-    cursor = connection.cursor()
-    query="""SELECT MAX(`Rental Index`) FROM 'Game Rentals' ORDER By 'Rental Index' """
-    cursor.execute(query)
-    row = (cursor.fetchone())[0]
-    return(row)
-
+    connection.execute(insert_query, rental_period_data)
 
 def insert_new_rental_into_database(customer_id,game_id,formatted_date):
     """
     This function insert new data into the the sql rental database
     It insert a new rental occurence into the game rentals table and rental periods table.
     The input paramaters are the customer id, game id and formatted date.
+    It must be called inside run_in_transaction so both inserts are committed together.
     """
-    new_rental_index = int(latest_customer_index()) + 1
-    
-    data_tuple = (new_rental_index, customer_id, game_id)
+    data_tuple = (customer_id, game_id)
     
-    insert_new_data_into_game_rentals(data_tuple)
+    new_rental_index = insert_new_data_into_game_rentals(data_tuple)
     
     data_tuple=(new_rental_index,formatted_date,"")
     
@@ -112,43 +98,18 @@ def decision_process(customer_id,customer_subscription_dictionary):
     
     return(check_customer_rentals,reason)
 
-def find_all_rental_periods_for_customer(customer_id):
+def count_active_rentals_for_customer(customer_id):
     """
-    This searches the sql database rental period table for all instances a customer rents out any game.
-    It takes input as the customer_id and returns a list of tuples containing game hire rental end dates
-    belonging to that customer.
+    This is responsible for determining how many games a customer has hired and not returned.
+    It takes the customer id as input and looks it up in the open rentals table,
+    so the rental history of the customer does not need to be fetched.
+    The return value is the total number of active game rentals.
     """
-    connection = sqlite3.connect('RentalCompany.db')
-    cursor = connection.cursor()
-
-    query = """
-            SELECT RP.'Rental End Date'
-            FROM 'Rental Periods' AS RP
-            INNER JOIN 'Game Rentals' AS GR ON GR.'Rental Index' = RP.'Rental Index'
-            WHERE GR.'Customer Id' = ?
-            """
+    cursor = get_connection().cursor()
 
-    cursor.execute(query, (customer_id,))
-
-    result = cursor.fetchall()
-        
-    connection.close()
+    cursor.execute('SELECT COUNT(*) FROM "Open Rentals" WHERE "Customer Id" = ?', (customer_id,))
 
-    return result
-
-def how_many_active_rentals(rental_end_dates):
-    """
-    This function is responsible for determining how many games a customer has hired and not returned.
-    It takes input in the form of rental end dates belonging to a customer.
-    The return is a value which is the total number of active game rentals.
-    """
-    number_of_active_customer_rentals=0
-    
-    for rental_end in rental_end_dates:
-        
-        if rental_end[0]==None or rental_end[0]=="":
-            
-            number_of_active_customer_rentals+=1
+    number_of_active_customer_rentals = (cursor.fetchone())[0]
 
     return(number_of_active_customer_rentals)
 
@@ -156,30 +117,44 @@ def can_customer_rent_another_game(customer_id,game_id):
     """
     This function determines if a customer can rent a game and if that game is avaliable,
     provided that both attributes are correct a rental record is made in the rental database.
-    The subscriptionManager_v11 functions load_subscriptions is used to convert a text file containing
-    subscription data into a dictionary and the get_rental_limit is used for each customer to determine
-    how many games they can rent based on there subscription.
+    The subscription store provides the subscription text file as a dictionary, parsed once and only
+    read again when the file changes, and the subscriptionManager_v11 function get_rental_limit is used
+    for each customer to determine how many games they can rent based on there subscription.
     The input parameters are the customer_id of interest and the game_id of interest.
     The return value is a str which tells you what the rental decision.
     
     """
     todays_date=datetime.today()
-    formatted_date = todays_date.strftime("%d-%m-%Y")
+    formatted_date = todays_date.strftime("%Y-%m-%d")
 
-    customer_subscription_dictionary=load_subscriptions(r"Customer Subscription Data.txt")
+    customer_subscription_dictionary=get_subscriptions(r"Customer Subscription Data.txt")
     
     """The decision variable returns a tuple made up of a boolean  and string.
     If the boolean value is True it means the customer_id is an active subscription.
     The string specifys the reason if the boolean value is false"""
     decision=(decision_process(customer_id,customer_subscription_dictionary))
     
+    rental_decision=run_in_transaction(rental_decision_transaction,customer_id,game_id,decision,
+                                       customer_subscription_dictionary,formatted_date)
+    
+    return(rental_decision)
+
+def rental_decision_transaction(customer_id,game_id,decision,customer_subscription_dictionary,formatted_date):
+    """
+    This makes the rental decision for can_customer_rent_another_game and records the rental.
+    It is run inside run_in_transaction, so the availability of the game, the number of active
+    rentals of the customer and the new rental are checked and written as one atomic step
+    and two terminals can never hand out the same game at the same moment.
+    It takes the customer id, the game id, the subscription decision, the subscription dictionary
+    and the formatted date of the rental, and returns the rental decision as a str.
+    """
     """The game_avaliability variable returns a single boolean value, 
     a true value means the game id of interest is avalaible to rent."""
-    game_avaliability=not(is_game_hired_out(find_rental_periods_for_game(game_id)))[0]
+    game_avaliability=not(game_hire_status(game_id))[0]
 
     if game_avaliability==True and decision[0]==True:
         
-        current_number_of_rentals=(how_many_active_rentals(find_all_rental_periods_for_customer(customer_id)))
+        current_number_of_rentals=count_active_rentals_for_customer(customer_id)
         subscription_service=get_rental_limit((customer_subscription_dictionary.get(str(customer_id)).get("SubscriptionType")))
         
         if (subscription_service+1) > current_number_of_rentals:
@@ -199,6 +174,142 @@ def can_customer_rent_another_game(customer_id,game_id):
         rental_decision=decision[1] + f"and Game Id {str(game_id)} currently rented out to another customer"
     
     return(rental_decision)
+
+def split_rental_requests(lines):
+    """
+    This splits lines of rental requests into the customer id and the game id of each rental,
+    which must be separated by exactly one comma. Blank lines are skipped.
+    It takes a list of lines and returns a tuple made up of a list of (customer id, game id) tuples of strings
+    and a list of the lines which are not a customer id and a game id separated by one comma.
+    """
+    rental_requests=[]
+
+    invalid_lines=[]
+
+    for line in lines:
+
+        if not line.strip():
+            continue
+
+        if line.count(",")==1:
+            customer_id,game_id=line.split(",")
+            rental_requests.append((customer_id.strip(),game_id.strip()))
+
+        else:
+            invalid_lines.append(line)
+
+    return(rental_requests,invalid_lines)
+
+def read_rental_requests(file_name):
+    """
+    This reads a file of rental requests, such as a scanned basket of games, with the customer id
+    and the game id of one rental on each line separated by a comma.
+    It takes the file name and returns the tuple of split_rental_requests, the rental requests and the invalid lines.
+    """
+    with open(file_name,"r") as rental_request_file:
+
+        return(split_rental_requests(rental_request_file.read().splitlines()))
+
+def invalid_rental_request_report(invalid_lines):
+    """
+    This reports the lines of rental requests which are not a customer id and a game id separated by one comma.
+    It returns a list of tuples in the same form as the rental report of rent_games_to_customers,
+    with the line in place of the customer id and None in place of the game id.
+    """
+    return([(line,None,f"Invalid line '{line}' was not rented, it must be a customer id and a game id separated by one comma.") for line in invalid_lines])
+
+def count_open_rentals_in_batch(column,values_json):
+    """
+    This counts the open rentals of every customer or game of a batch with one query.
+    It takes the open rentals column to count by, 'Customer Id' or 'Game Id', and the ids as a json list,
+    and returns a dictionary of the number of open rentals keyed on each id as given in the list.
+    """
+    cursor = get_connection().cursor()
+
+    query = f"""SELECT value,(SELECT COUNT(*) FROM "Open Rentals" WHERE "{column}" = value) FROM json_each(?)"""
+
+    cursor.execute(query, (values_json,))
+
+    return(dict(cursor.fetchall()))
+
+def rent_games_transaction(rental_requests,customer_subscription_dictionary,formatted_date):
+    """
+    This makes the rental decision for every request of rent_games_to_customers and records the rentals.
+    It is run inside run_in_transaction, so the whole batch is checked and written as one atomic step.
+    The open rentals of every customer and game in the batch are counted by two queries, and the
+    decisions are then made in memory with the same rules as rental_decision_transaction, counting the
+    rentals granted earlier in the batch, so each request gets the decision it would get if the requests
+    were made one after another. The open rentals are counted against the canonical_id of each customer and game,
+    so ids which SQLite matches as the same, such as ' 7' and '7', share their counts as they would one after another.
+    It takes a list of (customer id, game id) tuples of strings, the subscription dictionary and the
+    formatted date, and returns a list of tuples of the customer id, game id and rental decision.
+    """
+    customer_rentals=count_open_rentals_in_batch("Customer Id",json.dumps(sorted({canonical_id(customer_id) for customer_id,game_id in rental_requests})))
+    
+    game_rentals=count_open_rentals_in_batch("Game Id",json.dumps(sorted({canonical_id(game_id) for customer_id,game_id in rental_requests})))
+    
+    rental_report=[]
+    
+    for customer_id,game_id in rental_requests:
+        
+        customer_key=canonical_id(customer_id)
+        
+        game_key=canonical_id(game_id)
+        
+        decision=decision_process(customer_id,customer_subscription_dictionary)
+        
+        game_avaliability=not(hire_status_from_open_rentals(game_rentals[game_key]))[0]
+        
+        if game_avaliability==True and decision[0]==True:
+            
+            subscription_service=get_rental_limit((customer_subscription_dictionary.get(str(customer_id)).get("SubscriptionType")))
+            
+            if (subscription_service+1) > customer_rentals[customer_key]:
+                insert_new_rental_into_database(customer_id,game_id,formatted_date)
+                customer_rentals[customer_key]+=1
+                game_rentals[game_key]+=1
+                rental_decision=(f"Game Id {str(game_id)} succesfully rented out to {str(customer_id)}.")
+            
+            else:
+                rental_decision=(f"{str(customer_id)} has too many active subscriptions currently.")
+                
+        elif game_avaliability==False and decision[0]==True:
+            rental_decision=(f"Game Id {str(game_id)} currently rented out to another customer.")
+        
+        elif game_avaliability==True and decision[0]==False:
+            rental_decision=(decision[1])
+            
+        elif game_avaliability==False and decision[0]==False:
+            rental_decision=decision[1] + f"and Game Id {str(game_id)} currently rented out to another customer"
+        
+        rental_report.append((customer_id,game_id,rental_decision))
+    
+    return(rental_report)
+
+def rent_games_to_customers(rental_requests):
+    """
+    This function processes a batch of rental requests, such as a scanned basket of games, in one transaction.
+    It takes a list of (customer id, game id) pairs, or the name of a file with one comma separated pair
+    on each line, and returns a list of tuples of the customer id, game id and the rental decision
+    can_customer_rent_another_game would give for the request.
+    The lines of a file which are not a pair come first in the list, as reported by invalid_rental_request_report.
+    """
+    invalid_lines=[]
+
+    if isinstance(rental_requests,str):
+        rental_requests,invalid_lines=read_rental_requests(rental_requests)
+    
+    rental_requests=[(str(customer_id),str(game_id)) for customer_id,game_id in rental_requests]
+    
+    todays_date=datetime.today()
+    formatted_date = todays_date.strftime("%Y-%m-%d")
+
+    customer_subscription_dictionary=get_subscriptions(r"Customer Subscription Data.txt")
+    
+    rental_report=run_in_transaction(rent_games_transaction,rental_requests,customer_subscription_dictionary,formatted_date)
+    
+    return(invalid_rental_request_report(invalid_lines)+rental_report)
+
 """ To test the function, uncomment the line below and run it to see if it correctly outputs the code
     succesful application should mean the last row in the sql dataframe should be the new value added"""
     
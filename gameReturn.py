@@ -5,8 +5,10 @@ Created on Fri Nov 10 18:36:42 2023
 @author: James
 """
 
-import sqlite3
 import datetime
+import json
+import re
+from connectionManager import get_connection,run_in_transaction
 #This module is responsbile for returning games when provided with a game id.
 def does_game_exist(game_id):
     """ 
@@ -14,15 +16,12 @@ def does_game_exist(game_id):
     It takes the parameter game id and returns a boolean expression, true if game
     exists and false if games does not exist.
     """
-    connection_to_sql_database=sqlite3.connect('RentalCompany.db')
-    cursor=connection_to_sql_database.cursor()
+    cursor=get_connection().cursor()
 
     cursor.execute("SELECT COUNT(*) FROM 'Game Rental Dates' AS GRD WHERE GRD.'Game Id' =? ", (game_id,))
 
     game_id_existence =(cursor.fetchone())[0] > 0
     
-    connection_to_sql_database.close()
-    
     return(game_id_existence)
 
 def find_rental_periods_for_game(game_id):
@@ -31,8 +30,7 @@ def find_rental_periods_for_game(game_id):
     It takes the parameter game id and returns a list of tuples with each tuple representing
     a single return date for that particular game id. 
     """
-    connection = sqlite3.connect('RentalCompany.db')
-    cursor = connection.cursor()
+    cursor = get_connection().cursor()
 
     query = """
             SELECT RP.'Rental End Date'
@@ -45,10 +43,23 @@ def find_rental_periods_for_game(game_id):
 
     result = cursor.fetchall()
 
-    connection.close()
-
     return result
 
+def count_open_rentals_for_game(game_id):
+    """
+    This counts how many times a game id is currently rented out.
+    It takes the parameter game id and looks it up in the open rentals table,
+    which holds a row for each rental that has not been returned.
+    It returns the number of open rentals as an integer.
+    """
+    cursor = get_connection().cursor()
+
+    cursor.execute('SELECT COUNT(*) FROM "Open Rentals" WHERE "Game Id" = ?', (game_id,))
+
+    open_rentals = (cursor.fetchone())[0]
+
+    return open_rentals
+
 def is_game_hired_out(rental_end_dates):
     """
     This deduces whether a game is currently hired out based on its rental dates.
@@ -59,13 +70,29 @@ def is_game_hired_out(rental_end_dates):
     the game is currently at the store.
     """
     open_return=0
-    description="Game ID is rented out already."
 
     for rental_end in rental_end_dates:
         if rental_end[0]==None or rental_end[0]=="":
             
             open_return+=1
      
+    return(hire_status_from_open_rentals(open_return))
+
+def game_hire_status(game_id):
+    """
+    This deduces whether a game is currently hired out from the open rentals table.
+    It takes the parameter game id and returns the same tuple as is_game_hired_out,
+    without fetching the rental history of the game.
+    """
+    return(hire_status_from_open_rentals(count_open_rentals_for_game(game_id)))
+
+def hire_status_from_open_rentals(open_return):
+    """
+    This turns the number of open rentals of a game into its hire status.
+    It returns a tuple made up of a boolean and a string, as described in is_game_hired_out.
+    """
+    description="Game ID is rented out already."
+
     if open_return>1:
          description="Game Id Rented out multiple times at same time"
          response=True
@@ -79,56 +106,182 @@ def is_game_hired_out(rental_end_dates):
         
     return(response,description)
 
-def update_rental_period_table(game_id):
+def close_open_rentals(game_id,formatted_date):
     """
-    This updates the rental period sql table in the database by setting the rental end
-    dates to todays date for the given game ids.
-    It take the game id as input.
+    This closes the open rentals of a game in one statement, if the game exists, by setting their
+    rental end date to the date given.
+    The open rentals are found through the open rentals table, so only the rental periods being closed
+    are read, and RETURNING hands back the rental indexes closed without another query.
+    It takes the game id and the formatted date and returns a list of the rental indexes closed,
+    which is empty if the game does not exist or is not rented out.
     """
-
-    todays_date=datetime.date.today()
-    formatted_date = todays_date.strftime("%d-%m-%Y")
-    connection = sqlite3.connect('RentalCompany.db')
-    new_cursor = connection.cursor()
+    connection = get_connection()
 
     query = """
-        UPDATE `Rental Periods`
-        SET `Rental End Date` = ?
-        WHERE `Rental Index` IN (
-            SELECT `Rental Index`
-            FROM `Game Rentals`
-            WHERE `Game Id` = ?
-        )
-        AND (`Rental End Date` IS NULL OR `Rental End Date` = '')
+        UPDATE "Rental Periods"
+        SET "Rental End Date" = ?
+        WHERE "Rental Index" IN (SELECT "Rental Index" FROM "Open Rentals" WHERE "Game Id" = ?)
+        AND EXISTS (SELECT 1 FROM "Game Rental Dates" WHERE "Game Id" = ?)
+        RETURNING "Rental Index"
         """
 
-    new_cursor.execute(query,(formatted_date, game_id,))
+    cursor = connection.execute(query, (formatted_date, game_id, game_id))
+
+    return([rental_index for (rental_index,) in cursor.fetchall()])
+
+def return_game_transaction(game_id,formatted_date):
+    """
+    This makes the return decision for returning_game and records the return.
+    It is run inside run_in_transaction, so the game is checked and its rental closed as one atomic step.
+    A game which is rented out is returned by a single update. Only when nothing was closed is the
+    game looked up again, to tell a game which does not exist from one which is at the store.
+    It takes the game id and the formatted date of the return and returns the outcome message as a str.
+    """
+    if close_open_rentals(game_id,formatted_date):
+        message=(f"{str(game_id)} successfully returned.")
 
-    connection.commit()
-    connection.close()
+    elif does_game_exist(game_id)==True:
+        message=(f"{str(game_id)} is currently avaliable for hire, please double check you have inputed the correct game id.")
+
+    else:
+        message=(f"{str(game_id)} does not exist in rental company database,\
+please double check you have inputed the correct game id to return.")
+
+    return(message)
 
 def returning_game(game_id):
     """
     This function processes the return of a game by updating its rental status in the sql database
     if the game exists and if the game can be returned.
     It takes game id as input and returns a str message indicating the outcome of the rental return.
-    
+    The check and the update are made in one transaction by return_game_transaction.
     """
-    message=(f"{str(game_id)} does not exist in rental company database,\
-please double check you have inputed the correct game id to return.")
-    if does_game_exist(game_id)==True:
-        
-        rental_dates=find_rental_periods_for_game(game_id)
-        
-        game_rental_status=is_game_hired_out(rental_dates)[0]
-        
-        if game_rental_status==True:
-            update_rental_period_table(game_id)
-            message=(f"{str(game_id)} successfully returned.")
-            
-        else:
-            message=(f"{str(game_id)} is currently avaliable for hire, please double check you have inputed the correct game id.")
+    formatted_date=datetime.date.today().strftime("%Y-%m-%d")
+
+    message=run_in_transaction(return_game_transaction,game_id,formatted_date)
 
     return(message)
 
-#
\ No newline at end of file
+def read_game_ids(file_name):
+    """
+    This reads a file of game ids, such as a scan of the drop box, with one game id on each line.
+    Blank lines are skipped. It takes the file name and returns a list of the game ids as strings.
+    """
+    with open(file_name,"r") as game_id_file:
+
+        game_ids=[line.strip() for line in game_id_file if line.strip()]
+
+    return(game_ids)
+
+def canonical_id(id_text):
+    """
+    This returns the form of a game or customer id that SQLite matches it on, so ids which SQLite
+    treats as the same, such as ' 7' and '7', are counted as one id within a batch.
+    The id columns have integer affinity, so an id which reads as a whole number is compared as that number
+    whatever the spaces or leading zeros around it. Any other id is compared as its text.
+    It takes the id as a str and returns the canonical id as a str.
+    """
+    if re.fullmatch(r"\s*[+-]?[0-9]+\s*",id_text):
+        return(str(int(id_text)))
+
+    return(id_text)
+
+def returnable_games(game_ids_json):
+    """
+    This picks out the game ids of a batch which exist in the database and which are rented out.
+    It takes the game ids as a json list, which json_each turns into rows so the whole batch is
+    checked by one query, and returns a tuple of two sets of the game ids as given in the list,
+    the games which exist and the games which are rented out.
+    """
+    connection = get_connection()
+
+    query = """
+        SELECT value,EXISTS (SELECT 1 FROM "Open Rentals" WHERE "Game Id" = value)
+        FROM json_each(?)
+        WHERE value IN (SELECT "Game Id" FROM "Game Rental Dates")
+        """
+
+    rows = connection.execute(query, (game_ids_json,)).fetchall()
+
+    existing_games = {game_id for game_id, rented_out in rows}
+
+    rented_out_games = {game_id for game_id, rented_out in rows if rented_out}
+
+    return(existing_games,rented_out_games)
+
+def close_open_rentals_for_games(game_ids_json,formatted_date):
+    """
+    This closes the open rentals of every game in a json list of game ids in one statement,
+    by setting their rental end date to the date given. It returns the number of rentals closed.
+    """
+    connection = get_connection()
+
+    query = """
+        UPDATE "Rental Periods"
+        SET "Rental End Date" = ?
+        WHERE "Rental Index" IN (SELECT "Rental Index" FROM "Open Rentals" WHERE "Game Id" IN (SELECT value FROM json_each(?)))
+        """
+
+    cursor = connection.execute(query, (formatted_date, game_ids_json))
+
+    return(cursor.rowcount)
+
+def return_games_transaction(game_ids,formatted_date):
+    """
+    This makes the return decision for every game id of returning_games and records the returns.
+    It is run inside run_in_transaction, so the whole batch is checked and returned as one atomic step.
+    The batch is checked by one query and the rentals of every game being returned are closed by one update.
+    The outcome of each game id is the one returning_game would give if the game ids were returned
+    one after another, so a game id listed twice is returned the first time and found at the store the second.
+    The game ids are matched by their canonical_id, so a game listed as ' 7' and as '7' is also listed twice,
+    while the messages keep each game id as it was given.
+    It takes a list of game ids as strings and the formatted date, and returns a list of tuples of the
+    game id and its outcome message.
+    """
+    game_id_keys={game_id:canonical_id(game_id) for game_id in game_ids}
+
+    game_ids_json=json.dumps(sorted(set(game_id_keys.values())))
+
+    existing_games,rented_out_games=returnable_games(game_ids_json)
+
+    close_open_rentals_for_games(json.dumps(sorted(rented_out_games)),formatted_date)
+
+    returned_games=set()
+
+    return_report=[]
+
+    for game_id in game_ids:
+
+        game_id_key=game_id_keys[game_id]
+
+        if game_id_key in rented_out_games and game_id_key not in returned_games:
+            message=(f"{game_id} successfully returned.")
+            returned_games.add(game_id_key)
+
+        elif game_id_key in existing_games:
+            message=(f"{game_id} is currently avaliable for hire, please double check you have inputed the correct game id.")
+
+        else:
+            message=(f"{game_id} does not exist in rental company database,\
+please double check you have inputed the correct game id to return.")
+
+        return_report.append((game_id,message))
+
+    return(return_report)
+
+def returning_games(game_ids):
+    """
+    This function processes the return of a batch of games, such as the drop box pile, in one transaction.
+    It takes a list of game ids, or the name of a file with one game id on each line,
+    and returns a list of tuples of each game id and the message returning_game would give for it.
+    """
+    if isinstance(game_ids,str):
+        game_ids=read_game_ids(game_ids)
+
+    game_ids=[str(game_id) for game_id in game_ids]
+
+    formatted_date=datetime.date.today().strftime("%Y-%m-%d")
+
+    return_report=run_in_transaction(return_games_transaction,game_ids,formatted_date)
+
+    return(return_report)
@@ -4,14 +4,17 @@ Created on Sat Nov 11 19:56:02 2023
 
 @author: James
 """
-import sqlite3
-from gameReturn import *
+from connectionManager import get_connection
+from gameReturn import game_hire_status
 
 class Search:
     """
     This is a class which creates objects which store game data.
     It contains a function to add a new object attribute which determines game avaliability.
+    The attributes, including avaliable, are declared in __slots__, so an object has no __dict__.
     """
+    __slots__ = ("game_id", "title", "genre", "platform", "avaliable")
+
     def __init__(self, game_id, title,platform,genre):
         
         self.game_id = game_id
@@ -37,8 +40,7 @@ def title_search(title,platform):
     It returns a list of tuples containing any search matches
     The tuple contains game id, title, platform and genre data attributes.
     """
-    connection = sqlite3.connect('RentalCompany.db')
-    cursor = connection.cursor()
+    cursor = get_connection().cursor()
     
     query="""
     SELECT  GRD.'Game Id',GC.'Title',GC.'Platform',GG.'Genre'
@@ -49,8 +51,30 @@ def title_search(title,platform):
     """
     cursor.execute(query,(title,platform,))
     result = cursor.fetchall()
+    
+    return(result)
 
-    connection.close()
+def title_search_with_availability(title,platform):
+    """
+    Searches the sql database for games matching a specific title and game platform, along with their availability.
+    It takes a title and platform as paramaters.
+    It returns a list of tuples containing any search matches, in the same order as title_search.
+    The tuple contains game id, title, platform and genre data attributes followed by a boolean
+    which is True if the copy is currently rented out. Every copy is checked in the same query
+    against the open rentals table, rather than with one query per copy.
+    """
+    cursor = get_connection().cursor()
+    
+    query="""
+    SELECT  GRD.'Game Id',GC.'Title',GC.'Platform',GG.'Genre',
+            EXISTS (SELECT 1 FROM 'Open Rentals' AS ORS WHERE ORS.'Game Id'=GRD.'Game Id')
+    FROM 'Game Rental Dates' AS GRD
+    INNER JOIN 'Game Catalogue' AS GC ON GC.'Catalogue Index'=GRD.'Catalogue Index'
+    INNER JOIN 'Game Genres' AS GG ON GC.'Title'=GG.'Title'
+    WHERE LOWER(GC.'Title') = ? and LOWER(GC.'Platform') = ? ;
+    """
+    cursor.execute(query,(title,platform,))
+    result = cursor.fetchall()
     
     return(result)
 
@@ -60,7 +84,7 @@ def check_game_avaliability(game_copy):
     It takes a game id as input and returns a boolean expression
     True indicates the game is avaliable to hire.
     """
-    return(not(is_game_hired_out(find_rental_periods_for_game(game_copy))[0]))
+    return(not(game_hire_status(game_copy)[0]))
 
 def get_available_games_info(title,platform):
     """
@@ -73,12 +97,12 @@ def get_available_games_info(title,platform):
     """
     
     game_id_list=[]
-    games=title_search((title).lower(),(platform).lower())
+    games=title_search_with_availability((title).lower(),(platform).lower())
 
-    for game_id in games:
+    for *game_id,rented_out in games:
         game=Search(*game_id)
         
-        if (check_game_avaliability(game.game_id))==True:
+        if rented_out==False:
             game.avalability("Avaliable")
             
         else:
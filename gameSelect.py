@@ -4,10 +4,18 @@ Created on Sat Nov 11 22:24:48 2023
 
 @author: James
 """
-import sqlite3
-import pandas as pd
+from connectionManager import get_connection
+from queryCache import cached_query
+from purchasePlanner import plan_purchases,plan_purchases_by_platform
+from dateNormalizer import STORAGE_DATE_FORMAT
 from datetime import datetime
-import matplotlib.pyplot as plt
+
+"""
+pandas and matplotlib take a long time to import, so they are imported by the functions using them
+the first time they are called rather than when this module is imported.
+The dataframes and counts read from the database are cached by queryCache.py until the rental data changes,
+so the menu and games_to_buy asking for the same month again are answered from memory.
+"""
 
 def month_to_int(month_name):
     """
@@ -30,75 +38,150 @@ def month_to_int(month_name):
     }
     return month_dict.get(month_name.lower())
 
-def get_dataframe_for_genre_popularity():
+def rental_end_month_filter(month):
+    """
+    This builds the sql condition and parameters which keep the rentals that ended in a given month of any year.
+    The rental dates are stored as year-month-day text, so the month is the two characters from the sixth,
+    which the 'Rental Periods By End Month' index is built on. Open rentals have no end date and never match.
+    It takes a month as an integer, or None for every rental, and returns a tuple of a str and a list.
+    """
+    if month is None:
+        return("",[])
+    return("WHERE substr(GP.'Rental End Date',6,2)=?",[f"{int(month):02d}"])
+
+@cached_query
+def get_dataframe_for_genre_popularity(month=None):
     """
     This retrieves every rental entry within the sql rental business database
     It gathers the rental index,genre,rental start and rental end dates.
+    If a month is given only the rentals which ended in that month are retrieved.
     It then returns this as a dataframe. This dataframe is used to
     identify the most popular genres.
     """
-    connection = sqlite3.connect('RentalCompany.db')
-    cursor = connection.cursor()
+    import pandas as pd
     
-    query="""
+    connection = get_connection()
+    
+    month_condition,parameters=rental_end_month_filter(month)
+    
+    query=f"""
     SELECT GR.'Rental Index',GG.'Genre',GP.'Rental Start Date',GP.'Rental End Date'
     FROM 'Game Rentals' as GR
     INNER JOIN'Rental Periods' as GP on GP.'Rental Index'=GR.'Rental Index'
     INNER JOIN'Game Rental Dates' as GRD ON GRD.'Game Id'=GR.'Game Id'
     INNER JOIN'Game Catalogue' as GC ON GC.'Catalogue Index'=GRD.'Catalogue Index'
     INNER JOIN'Game Genres'as GG ON GC.'Title'=GG.'Title'
+    {month_condition}
     """
     
-    df = pd.read_sql_query(query, connection)
+    df = pd.read_sql_query(query, connection, params=parameters)
     
-    connection.close()
     return(df)
 
-def get_dataframe_for_title_popularity():
+@cached_query
+def get_dataframe_for_title_popularity(month=None):
     """
     This retrieves every rental entry within the sql rental business database
     It gathers the rental index,game title,rental start and rental end dates.
+    If a month is given only the rentals which ended in that month are retrieved.
     It then returns this as a dataframe. This dataframe is used to
     identify the most popular titles.
     """
-    connection = sqlite3.connect('RentalCompany.db')
-    cursor = connection.cursor()
+    import pandas as pd
     
-    query="""
+    connection = get_connection()
+    
+    month_condition,parameters=rental_end_month_filter(month)
+    
+    query=f"""
     SELECT GR.'Rental Index',GC.'Title',GP.'Rental Start Date',GP.'Rental End Date'
     FROM 'Game Rentals' as GR
     INNER JOIN'Rental Periods' as GP on GP.'Rental Index'=GR.'Rental Index'
     INNER JOIN'Game Rental Dates' as GRD ON GRD.'Game Id'=GR.'Game Id'
     INNER JOIN'Game Catalogue' as GC ON GC.'Catalogue Index'=GRD.'Catalogue Index'
+    {month_condition}
     """
     
-    df = pd.read_sql_query(query, connection)
+    df = pd.read_sql_query(query, connection, params=parameters)
     
-    connection.close()
     return(df)
 
-def most_popular_title_for_month(month):
+@cached_query
+def get_dataframe_for_rentals_between(start_date,end_date):
     """
-    This function determines the most popular game titles for a given month.
-    It takes a month as input and return a tuple containing a str and series.
-    The str declares the most popular game title of them all, whilst the series
-    shows the popularity for each game title present.
+    This retrieves the rentals which started between two dates, including both dates.
+    It takes the dates as date or datetime objects, or as year-month-day strings,
+    and returns a dataframe of the rental index, game title, rental start and rental end dates.
+    The dates are compared as text in the database, which the 'Rental Periods By Start Date' index answers.
+    """
+    import pandas as pd
+    
+    connection = get_connection()
+    
+    if not isinstance(start_date,str):
+        start_date=start_date.strftime(STORAGE_DATE_FORMAT)
+    if not isinstance(end_date,str):
+        end_date=end_date.strftime(STORAGE_DATE_FORMAT)
+    
+    query="""
+    SELECT GR.'Rental Index',GC.'Title',GP.'Rental Start Date',GP.'Rental End Date'
+    FROM 'Rental Periods' as GP
+    INNER JOIN'Game Rentals' as GR on GP.'Rental Index'=GR.'Rental Index'
+    INNER JOIN'Game Rental Dates' as GRD ON GRD.'Game Id'=GR.'Game Id'
+    INNER JOIN'Game Catalogue' as GC ON GC.'Catalogue Index'=GRD.'Catalogue Index'
+    WHERE GP.'Rental Start Date' BETWEEN ? AND ?
+    ORDER BY GP.'Rental Start Date'
+    """
+    
+    df = pd.read_sql_query(query, connection, params=(start_date,end_date))
+    
+    return(df)
+
+@cached_query
+def count_rentals_for_month(column,month):
     """
-    # This function is assumed to return a DataFrame with a 'Rental End Date' column
-    data = get_dataframe_for_title_popularity()
+    This counts the rentals of each game title or genre which ended in a given month.
+    It takes the column to count by, 'Title' or 'Genre', and a month as an integer, or None for every month.
+    The counts are read from the 'Monthly Rentals' table, which the database keeps up to date with a count
+    for each title and platform in each month, so only a few dozen rows are read rather than every rental.
+    Genres are counted by joining each title to its genres, as a rental counts once for every genre of its title.
+    It returns a series of counts indexed by title or genre, named as value_counts would name it,
+    with the most rented first and ties in the order they were first rented.
+    """
+    import pandas as pd
+    
+    connection = get_connection()
+    
+    genre_join="INNER JOIN'Game Genres'as GG ON MR.'Title'=GG.'Title'" if column=="Genre" else ""
+    
+    group_column="GG.'Genre'" if column=="Genre" else "MR.'Title'"
     
-    # Convert 'Rental End Date' to datetime if it's not already
-    data['Rental End Date'] = pd.to_datetime(data['Rental End Date'], format='%d-%m-%Y')
+    month_condition="WHERE MR.'Month'=?" if month is not None else ""
     
-    # Extract the month from 'Rental End Date'
-    data['Rental End Month'] = data['Rental End Date'].dt.month
+    parameters=[int(month)] if month is not None else []
     
-    # Filter the data for rows where the month is October (10)
-    october_data = data[data['Rental End Month'] == month]
+    query=f"""
+    SELECT {group_column} AS '{column}',SUM(MR.'Rentals') AS 'count'
+    FROM 'Monthly Rentals' as MR
+    {genre_join}
+    {month_condition}
+    GROUP BY {group_column}
+    ORDER BY SUM(MR.'Rentals') DESC,MIN(MR.'First Rental Index')
+    """
     
+    counts = pd.read_sql_query(query, connection, params=parameters, index_col=column)['count']
     
-    # Get the value counts in descending order
-    title_counts = october_data['Title'].value_counts()
+    return(counts.astype("int64"))
+
+def most_popular_title_for_month(month):
+    """
+    This function determines the most popular game titles for a given month.
+    It takes a month as input and return a tuple containing a str and series.
+    The str declares the most popular game title of them all, whilst the series
+    shows the popularity for each game title present.
+    """
+    # The database counts the rentals of each title which ended in the month, in descending order
+    title_counts = count_rentals_for_month('Title',month)
     title_proportions = title_counts / title_counts.sum()
 
     # Most common title and its count
@@ -113,21 +196,8 @@ def most_popular_genre_for_month(month):
     The str declares the most popular game  genre of them all, whilst the series
     shows the popularity for each game genre present.
     """
-    # This function is assumed to return a DataFrame with a 'Rental End Date' column
-    data = get_dataframe_for_genre_popularity()
-    
-    # Convert 'Rental End Date' to datetime if it's not already
-    data['Rental End Date'] = pd.to_datetime(data['Rental End Date'])
-    
-    # Extract the month from 'Rental End Date'
-    data['Rental End Month'] = data['Rental End Date'].dt.month
-    
-    # Filter the data for rows where the month is October (10)
-    october_data = data[data['Rental End Month'] == month]
-    
-    
-    # Get the value counts in descending order
-    genre_counts = october_data['Genre'].value_counts()
+    # The database counts the rentals of each genre which ended in the month, in descending order
+    genre_counts = count_rentals_for_month('Genre',month)
     
     genre_proportions = genre_counts / genre_counts.sum()
     # Most common title and its count
@@ -140,21 +210,11 @@ def most_popular_title_for_month_graph(month):
     This function creates a graph to show the most popular game genres for a given month.
     It takes a month as input and return a graph.
     """
-    month=month_to_int(month)
-    # Assume this function returns a DataFrame with a 'Rental End Date' column
-    data = get_dataframe_for_title_popularity()
+    import matplotlib.pyplot as plt
     
-    # Convert 'Rental End Date' to datetime if it's not already
-    data['Rental End Date'] = pd.to_datetime(data['Rental End Date'])
-    
-    # Extract the month from 'Rental End Date'
-    data['Rental End Month'] = data['Rental End Date'].dt.month
-    
-    # Filter the data for rows where the month matches
-    month_data = data[data['Rental End Month'] == month]
-    
-    # Get the value counts in descending order
-    title_counts = month_data['Title'].value_counts()
+    month=month_to_int(month)
+    # The database counts the rentals of each title which ended in the month, in descending order
+    title_counts = count_rentals_for_month('Title',month)
     
     # Most common title and its count
     most_common_title = title_counts.idxmax()
@@ -186,20 +246,10 @@ def most_popular_genre_for_month_graph(month):
     This function creates a graph to show the most popular game titles for a given month.
     It takes a month as input and return a graph.
     """
-    # Assume this function returns a DataFrame with a 'Rental End Date' column
-    data = get_dataframe_for_genre_popularity()
+    import matplotlib.pyplot as plt
     
-    # Convert 'Rental End Date' to datetime if it's not already
-    data['Rental End Date'] = pd.to_datetime(data['Rental End Date'])
-    
-    # Extract the month from 'Rental End Date'
-    data['Rental End Month'] = data['Rental End Date'].dt.month
-    
-    # Filter the data for rows where the month matches
-    month_data = data[data['Rental End Month'] == month]
-    
-    # Get the value counts in descending order
-    genre_counts = month_data['Genre'].value_counts()
+    # The database counts the rentals of each genre which ended in the month, in descending order
+    genre_counts = count_rentals_for_month('Genre',month)
     
     # Most common genre and its count
     most_common_genre = genre_counts.idxmax()
@@ -232,6 +282,8 @@ def games_to_purchase(total_budget,popularity):
     Take input paramaters in the form of a budget and a series objects.
     It outputs out a series object which is a proportion.
     """
+    import pandas as pd
+    
     popularity = pd.to_numeric(popularity, errors='coerce')
     budget_allocation = popularity * int(total_budget)
     return(budget_allocation)
@@ -240,46 +292,43 @@ def check_purchase_costs_for_game(title):
     """
     Obtains cost for certain game titles for different platforms.
     """
-    connection_to_sql_database=sqlite3.connect('RentalCompany.db')
-    cursor=connection_to_sql_database.cursor()
+    cursor=get_connection().cursor()
     query="""SELECT Platform,"Purchase Price" FROM 'Game Catalogue' AS GC WHERE GC.'Title' =? """
     cursor.execute(query, (title,))
     costs=cursor.fetchall()
-    connection_to_sql_database.close()
     return(costs)
 
-def games_to_buy(total_budget,month_of_choice):
+def games_to_buy(total_budget,month_of_choice,by_platform=False):
     """
     Determines the number of copies of popular games to buy within a given budget 
     for a specified month. It does this by first determining the allocation of the 
     total budget across highly demanded games based on their popularity and then calculates 
     the average cost of each game across different platforms to estimate the 
-    number of copies that can be purchased."""
+    number of copies that can be purchased.
+    The copies are rounded down so that the total cost never goes over the budget.
+    If by_platform is True whole copies are planned for each platform with purchasePlanner.py,
+    spending what is left of the budget after rounding down, and the copies for each platform are listed."""
     most_popular_titles = most_popular_title_for_month(month_to_int(month_of_choice))[1]
-    games_budget_allocation = games_to_purchase(total_budget, most_popular_titles)
-    
-    # Function to calculate the average platform cost for a game
-    def calculate_average_cost(game_title):
-        platform_costs = check_purchase_costs_for_game(game_title)
-        if platform_costs:
-            total_cost = sum(cost for _, cost in platform_costs)
-            return total_cost / len(platform_costs)
-        else:
-            return 0  # Return 0 if there are no platforms to avoid division by zero
     
-    # Process each popular game
-    list_of_popular_games = list(games_budget_allocation.index)
+    # Every price is read in one query and the copies of every title are worked out together
+    purchase_plan = plan_purchases(total_budget, most_popular_titles)
+    
+    if by_platform:
+        platform_plan = plan_purchases_by_platform(total_budget, most_popular_titles)
+        platform_copies = {title: ", ".join(f"{platform}: {copies}" for platform, copies in zip(rows["Platform"], rows["Copies"]))
+                           for title, rows in platform_plan.groupby("Title", sort=False)}
+        copies_by_title = platform_plan.groupby("Title")["Copies"].sum()
+    
     messages_for_each_game=[]
-    for index, game in enumerate(list_of_popular_games):
-        average_game_cost = calculate_average_cost(game)
+    for game, average_game_cost, number_of_copies_to_buy in zip(purchase_plan["Title"], purchase_plan["Average Cost"], purchase_plan["Copies"]):
         message_1=(f"Game: {game}")
-        allocated_budget_for_game = games_budget_allocation[index]
     
-        if average_game_cost > 0:
-            number_of_copies_to_buy = allocated_budget_for_game / average_game_cost
-            message_2=(f"Number of Copies to Buy: {number_of_copies_to_buy:.0f}")
+        if average_game_cost <= 0:
+            message_2=("Cannot calculate the number of copies to buy due to zero cost.")
+        elif by_platform:
+            message_2=(f"Number of Copies to Buy: {copies_by_title[game]} ({platform_copies[game]})")
         else:
-            print("Cannot calculate the number of copies to buy due to zero cost.")
+            message_2=(f"Number of Copies to Buy: {number_of_copies_to_buy}")
         messages_for_each_game.append([message_1,message_2])
     return(messages_for_each_game)
 
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:55:04 2026
+
+@author: James
+"""
+import hashlib
+import os
+
+"""
+This module records how much of each text file has been loaded into the rental company database,
+in the 'Load State' table, so that a load only reads the lines added to a file since the last one.
+For every file the table holds the byte offset and line number the next load starts from, and a checksum
+of the start of the file and of the bytes just before the offset. The checksum tells a file which has only
+had lines added to its end apart from one which has been rewritten, which cannot be loaded incrementally.
+
+The state of a file is saved in the same transaction as the records read up to its offset,
+so a load stopped part way through, by a crash or otherwise, carries on from the last chunk stored.
+"""
+
+#This many bytes from the start of the file and from just before the offset make up the checksum.
+CHECKSUM_BYTES=4096
+
+def file_checksum(file_name,offset):
+    """
+    This works out the checksum of a text file up to a byte offset.
+    It takes the file name and the offset, and returns the sha256 digest of the first bytes of
+    the file and of the bytes before the offset as a hexadecimal string.
+    """
+    checksum=hashlib.sha256()
+
+    with open(file_name,"rb") as file_data:
+
+        checksum.update(file_data.read(min(offset,CHECKSUM_BYTES)))
+
+        file_data.seek(max(0,offset-CHECKSUM_BYTES))
+
+        checksum.update(file_data.read(min(offset,CHECKSUM_BYTES)))
+
+    return(checksum.hexdigest())
+
+def get_load_state(connection,file_name):
+    """
+    This reads the load state of a text file.
+    It returns a tuple of the byte offset, line number and checksum, or None if the file has never been loaded.
+    The offset is None for a file loaded before the load state was recorded.
+    """
+    cursor=connection.execute("""SELECT "Byte Offset","Line Number","Checksum" FROM "Load State" WHERE "File Name" = ?""",(file_name,))
+
+    return(cursor.fetchone())
+
+def save_load_state(connection,file_name,previous_offset,offset,line_number,checksum):
+    """
+    This records that a text file has been loaded up to a byte offset, on the connection given,
+    which is committed by the caller together with the records read.
+    It takes the offset the load started from, which must still be the one stored, so that two loads
+    of the same file at the same time cannot both store the same lines. A RuntimeError is raised if it is not.
+    """
+    cursor=connection.execute("""
+        INSERT INTO "Load State" ("File Name","Byte Offset","Line Number","Checksum","Loaded At")
+        VALUES (?,?,?,?,datetime('now'))
+        ON CONFLICT ("File Name") DO UPDATE SET
+            "Byte Offset"=excluded."Byte Offset",
+            "Line Number"=excluded."Line Number",
+            "Checksum"=excluded."Checksum",
+            "Loaded At"=excluded."Loaded At"
+        WHERE "Byte Offset" IS ?
+        """,(file_name,offset,line_number,checksum,previous_offset))
+
+    if cursor.rowcount==0:
+
+        raise RuntimeError(f"{file_name} has been loaded by another process since this load started")
+
+def find_load_start(connection,file_name):
+    """
+    This works out where the next load of a text file starts.
+    It returns a tuple of the byte offset and the number of the last line already read, which is 0 and 1,
+    the header line, for a new file.
+    A file loaded before the load state was recorded is taken to be fully loaded, so only lines added
+    from now on are read. A ValueError is raised if the file has been shortened or rewritten since it was loaded.
+    """
+    load_state=get_load_state(connection,file_name)
+
+    if load_state is None:
+
+        return(0,1)
+
+    offset,line_number,checksum=load_state
+
+    if offset is None:
+
+        offset=os.path.getsize(file_name)
+
+        with open(file_name,"rb") as file_data:
+
+            line_number=sum(1 for line in file_data)
+
+        save_load_state(connection,file_name,None,offset,line_number,file_checksum(file_name,offset))
+
+    elif os.path.getsize(file_name)<offset or file_checksum(file_name,offset)!=checksum:
+
+        raise ValueError(f"{file_name} has changed since it was last loaded, only lines added to the end of it can be loaded")
+
+    return(offset,line_number)
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 12:10:30 2026
+
+@author: James
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from connectionManager import get_connection
+
+"""
+This module runs the actions of the menu in Menu.ipynb on a pool of worker threads, so the notebook
+stays responsive while a search, a rental or a chart is being worked out, and a slow analytics request
+does not hold up the staff renting and returning games in the same session.
+
+Each action is shown in its Output widget with a progress bar, a status line and a cancel button,
+and its result is added to the widget when it is ready. Every worker thread has its own database
+connection from connectionManager.py, so the actions can run at the same time.
+A cancelled action which has not started yet is never run. One which is running has the query on its
+connection interrupted, which rolls back any transaction it is part way through. An action which
+finishes anyway, such as a rental whose transaction had already committed, still has its result shown,
+so the staff are never told that a rental or return did not happen when it did.
+
+ipywidgets and matplotlib are imported the first time they are needed, so this module can be imported
+outside of the notebook.
+"""
+
+MENU_WORKERS=4
+
+class TaskCancelled(Exception):
+    """
+    Raised in a worker thread for a task which was cancelled before it started.
+    """
+
+class MenuTask:
+    """
+    Holds one action of the menu which is running, or waiting to run, on the worker pool.
+
+    It owns the progress widgets shown in the Output widget of the action, and the connection of
+    the worker thread while the action runs, which is interrupted if the action is cancelled.
+    """
+    def __init__(self,description,output,show_result):
+
+        import ipywidgets as widgets
+
+        self.description=description
+
+        self.output=output
+
+        self.show_result=show_result
+
+        self.cancelled=threading.Event()
+
+        self.connection=None
+
+        self.future=None
+
+        self.started=time.perf_counter()
+
+        self.progress=widgets.IntProgress(value=0,min=0,max=1,description="Working:",bar_style="info")
+
+        self.status=widgets.Label(value=f"{description}...")
+
+        self.cancel_button=widgets.Button(description="Cancel")
+
+        self.cancel_button.on_click(self.cancel)
+
+        self.widget=widgets.HBox([self.progress,self.status,self.cancel_button])
+
+    def run(self,task_function,arguments):
+        """
+        This runs the action on a worker thread.
+        The connection of the thread is recorded while it runs so that cancel can interrupt its query.
+        """
+        #The connection is recorded before checking for a cancel, so a cancel either finds the connection
+        #to interrupt or is seen here before the action starts.
+        self.connection=get_connection()
+
+        if self.cancelled.is_set():
+
+            self.connection=None
+
+            raise TaskCancelled()
+
+        try:
+
+            return(task_function(*arguments))
+
+        finally:
+
+            self.connection=None
+
+    def cancel(self,button=None):
+        """
+        This cancels the action. An action still waiting for a worker is never run, and the query of
+        a running action is interrupted. It can be called from the cancel button or from code.
+        """
+        self.cancelled.set()
+
+        self.cancel_button.disabled=True
+
+        self.status.value=f"Cancelling {self.description.lower()}..."
+
+        self.progress.bar_style="warning"
+
+        connection=self.connection
+
+        if self.future is not None and self.future.cancel()==False and connection is not None:
+
+            connection.interrupt()
+
+    def finish(self,future):
+        """
+        This is called by the worker pool when the action ends, and shows its result or error in its Output widget.
+        An action which was cancelled but finished anyway has its result shown with a note that the cancel came too late,
+        since a rental or return whose transaction had committed has still been recorded.
+        """
+        self.cancel_button.disabled=True
+
+        self.progress.value=1
+
+        if future.cancelled():
+
+            self.status.value=f"{self.description} cancelled."
+
+            return
+
+        elapsed_time=time.perf_counter()-self.started
+
+        error=future.exception()
+
+        if error is None:
+
+            if self.cancelled.is_set():
+
+                self.status.value=f"Cancel came too late: {self.description.lower()} done in {elapsed_time:.1f} seconds."
+
+            else:
+
+                self.status.value=f"{self.description} done in {elapsed_time:.1f} seconds."
+
+            self.progress.bar_style="success"
+
+            self.show_result(self.output,future.result())
+
+        elif self.cancelled.is_set():
+
+            self.status.value=f"{self.description} cancelled."
+
+        else:
+
+            self.status.value=f"{self.description} failed."
+
+            self.progress.bar_style="danger"
+
+            self.output.append_stderr(f"{type(error).__name__}: {error}\n")
+
+class MenuTaskRunner:
+    """
+    Hands the actions of the menu to a pool of worker threads.
+    """
+    def __init__(self,max_workers=MENU_WORKERS):
+
+        self.executor=ThreadPoolExecutor(max_workers=max_workers,thread_name_prefix="menu")
+
+    def submit(self,output,description,task_function,*arguments,show_result=None):
+        """
+        This runs a function on the worker pool and shows its progress and result in an Output widget,
+        which is cleared first. It takes the Output widget, a short description of the action,
+        the function and its arguments, and optionally the function used to show the result,
+        print_result by default. It returns the MenuTask, which can be cancelled.
+        """
+        task=MenuTask(description,output,show_result or print_result)
+
+        output.outputs=()
+
+        output.append_display_data(task.widget)
+
+        task.future=self.executor.submit(task.run,task_function,arguments)
+
+        task.future.add_done_callback(task.finish)
+
+        return(task)
+
+    def shutdown(self):
+        """
+        This stops the worker pool once the actions already submitted have finished.
+        """
+        self.executor.shutdown(wait=True)
+
+def print_result(output,result):
+    """
+    This shows a result in an Output widget as print would.
+    """
+    output.append_stdout(f"{result}\n")
+
+def print_lines(output,lines):
+    """
+    This shows a list of lines in an Output widget, one below the other.
+    """
+    output.append_stdout("".join(f"{line}\n" for line in lines))
+
+def show_png(output,png_image):
+    """
+    This shows a png image, given as bytes, in an Output widget.
+    """
+    from IPython.display import Image
+
+    output.append_display_data(Image(data=png_image,format="png"))
+
+def render_chart_png(chart_function,*arguments):
+    """
+    This draws a chart on a worker thread and returns it as png bytes.
+    It takes a function returning a matplotlib figure, such as most_popular_title_for_month_graph,
+    and its arguments. The figure is drawn and closed by chartService.render_figure.
+    """
+    from chartService import render_figure
+
+    return(render_figure(chart_function,arguments,"png"))
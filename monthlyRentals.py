@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 12:02:57 2026
+
+@author: James
+"""
+from databaseSchema import SELECT_MONTHLY_RENTALS_QUERY
+from derivedTable import find_table_differences,verify_table,rebuild_table,run_table_command
+
+"""
+This module maintains the 'Monthly Rentals' table, which counts the rentals of each title and platform
+by the month and year they ended, and is read by the popularity analysis in gameSelect.py.
+The table is kept up to date by triggers whenever a rental is made, a game is returned or a game is added,
+so it only needs rebuilding if the rental tables were changed with the triggers missing.
+It can be run from the command line to check or rebuild the table:
+    python monthlyRentals.py verify
+    python monthlyRentals.py rebuild
+"""
+
+MONTHLY_RENTALS_COLUMNS='"Month","Year",Title,Platform,"Rentals","First Rental Index"'
+
+def find_monthly_rental_differences():
+    """
+    This compares the 'Monthly Rentals' table with the counts worked out from the rental history.
+    It returns a tuple of two lists of (month, year, title, platform, rentals, first rental index) tuples.
+    The first list holds the counts missing from the table, the second the rows in the table
+    which do not match the rental history.
+    """
+    return(find_table_differences("Monthly Rentals",MONTHLY_RENTALS_COLUMNS,SELECT_MONTHLY_RENTALS_QUERY))
+
+def verify_monthly_rentals():
+    """
+    This checks that the 'Monthly Rentals' table agrees with the rental history.
+    It returns a tuple made up of a boolean and a string, the boolean is True if they agree
+    and the string describes any differences found.
+    """
+    return(verify_table("Monthly Rentals",MONTHLY_RENTALS_COLUMNS,SELECT_MONTHLY_RENTALS_QUERY,
+                        "Monthly rentals table matches the rental history.",
+                        "Monthly rentals table is missing {} counts and holds {} counts that do not match the rental history."))
+
+def rebuild_monthly_rentals():
+    """
+    This empties the 'Monthly Rentals' table and fills it again from the rental history.
+    It returns the number of counts stored.
+    """
+    return(rebuild_table("Monthly Rentals",MONTHLY_RENTALS_COLUMNS,SELECT_MONTHLY_RENTALS_QUERY))
+
+if __name__=="__main__":
+
+    run_table_command("monthly rentals",verify_monthly_rentals,rebuild_monthly_rentals,"Monthly rentals table rebuilt with {} counts.")
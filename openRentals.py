@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:37:44 2026
+
+@author: James
+"""
+from databaseSchema import SELECT_OPEN_RENTALS_QUERY
+from derivedTable import find_table_differences,verify_table,rebuild_table,run_table_command
+
+"""
+This module maintains the 'Open Rentals' table, which holds one row for every game that is currently rented out.
+The table is kept up to date by triggers whenever a rental is made or a game is returned,
+so it only needs rebuilding if the rental tables were changed with the triggers missing.
+It can be run from the command line to check or rebuild the table:
+    python openRentals.py verify
+    python openRentals.py rebuild
+"""
+
+OPEN_RENTALS_COLUMNS='"Rental Index","Game Id","Customer Id"'
+
+def find_open_rental_differences():
+    """
+    This compares the 'Open Rentals' table with the open rentals found in the 'Rental Periods' table.
+    It returns a tuple of two lists of (rental index, game id, customer id) tuples.
+    The first list holds the open rentals missing from the table, the second the rows in the table
+    which do not match an open rental.
+    """
+    return(find_table_differences("Open Rentals",OPEN_RENTALS_COLUMNS,SELECT_OPEN_RENTALS_QUERY))
+
+def verify_open_rentals():
+    """
+    This checks that the 'Open Rentals' table agrees with the 'Rental Periods' table.
+    It returns a tuple made up of a boolean and a string, the boolean is True if the tables agree
+    and the string describes any differences found.
+    """
+    return(verify_table("Open Rentals",OPEN_RENTALS_COLUMNS,SELECT_OPEN_RENTALS_QUERY,
+                        "Open rentals table matches the rental periods table.",
+                        "Open rentals table is missing {} open rentals and holds {} rentals that are not open."))
+
+def rebuild_open_rentals():
+    """
+    This empties the 'Open Rentals' table and fills it again from the 'Rental Periods' table.
+    It returns the number of open rentals stored.
+    """
+    return(rebuild_table("Open Rentals",OPEN_RENTALS_COLUMNS,SELECT_OPEN_RENTALS_QUERY))
+
+if __name__=="__main__":
+
+    run_table_command("open rentals",verify_open_rentals,rebuild_open_rentals,"Open rentals table rebuilt with {} open rentals.")
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 12:06:25 2026
+
+@author: James
+"""
+from connectionManager import get_connection
+from queryCache import cached_query
+
+"""
+This module works out how many copies of the popular games to buy with a budget.
+Every purchase price in the catalogue is read in one query and the whole plan is worked out on a dataframe,
+rather than looking up the prices of each title one at a time.
+
+The budget is shared between the titles in proportion to their popularity. plan_purchases buys as many
+whole copies of each title as its share pays for at the average price of its platforms, rounding down,
+so the plan never costs more than the budget.
+plan_purchases_by_platform shares each title's budget between its platforms and buys whole copies at the
+price of each platform. The money left over from rounding down is then spent on one more copy of the
+titles and platforms which were closest to paying for another, for as long as the budget allows.
+"""
+
+@cached_query
+def get_purchase_prices():
+    """
+    This retrieves the title, platform and purchase price of every game in the catalogue.
+    It returns this as a dataframe.
+    """
+    import pandas as pd
+
+    connection = get_connection()
+
+    query="""
+    SELECT GC.'Title',GC.'Platform',GC.'Purchase Price'
+    FROM 'Game Catalogue' as GC
+    """
+
+    df = pd.read_sql_query(query, connection)
+
+    return(df)
+
+def popularity_frame(total_budget,popularity):
+    """
+    This shares a budget between the titles in proportion to their popularity.
+    It takes the budget and a series of popularity proportions indexed by title, such as the one returned
+    by most_popular_title_for_month, and returns a dataframe of the title, popularity and allocated budget,
+    keeping the order of the series.
+    """
+    import pandas as pd
+
+    popularity = pd.to_numeric(popularity, errors='coerce').fillna(0)
+
+    plan=pd.DataFrame({"Title":popularity.index,"Popularity":popularity.to_numpy()})
+
+    plan["Allocated Budget"]=plan["Popularity"]*int(total_budget)
+
+    return(plan)
+
+def plan_purchases(total_budget,popularity):
+    """
+    This works out how many copies of each title to buy, as games_to_buy has always done,
+    from the budget allocated to the title and the average purchase price of its platforms.
+    The number of copies is rounded down, so the copies bought never cost more than the budget.
+    It takes the budget and a series of popularity proportions indexed by title and returns a dataframe
+    of the title, popularity, allocated budget, average cost, copies and the cost of the copies.
+    A title with no purchase price in the catalogue has an average cost of 0 and no copies.
+    """
+    import numpy as np
+
+    plan=popularity_frame(total_budget,popularity)
+
+    average_costs=get_purchase_prices().groupby("Title")["Purchase Price"].mean()
+
+    plan["Average Cost"]=plan["Title"].map(average_costs).fillna(0)
+
+    copies=np.floor(plan["Allocated Budget"]/plan["Average Cost"].where(plan["Average Cost"]>0))
+
+    plan["Copies"]=copies.fillna(0).astype("int64")
+
+    plan["Cost"]=plan["Copies"]*plan["Average Cost"]
+
+    return(plan)
+
+def plan_purchases_by_platform(total_budget,popularity):
+    """
+    This works out how many whole copies of each title to buy on each platform without going over the budget.
+    Each title's share of the budget is split evenly between its platforms and as many copies as it pays for
+    are bought at the lowest price listed for the platform. The budget left over is then spent one copy at a time
+    on the titles and platforms with the largest fraction of a copy left unpaid, the most popular first
+    where they are equal, skipping any which cost more than is left. No platform is given more than one copy
+    beyond its share, so the plan follows the popularity of the titles as closely as whole copies allow.
+    It takes the budget and a series of popularity proportions indexed by title and returns a dataframe
+    of the title, platform, purchase price, target copies, copies and the cost of the copies.
+    """
+    import numpy as np
+
+    plan=popularity_frame(total_budget,popularity)
+
+    prices=get_purchase_prices()
+
+    prices=prices[prices["Purchase Price"]>0].groupby(["Title","Platform"],as_index=False)["Purchase Price"].min()
+
+    platform_plan=plan.merge(prices,on="Title",how="inner",sort=False)
+
+    platform_counts=platform_plan.groupby("Title")["Platform"].transform("size")
+
+    target_copies=platform_plan["Allocated Budget"]/platform_counts/platform_plan["Purchase Price"]
+
+    platform_plan["Target Copies"]=target_copies
+
+    platform_plan["Copies"]=np.floor(target_copies).astype("int64")
+
+    budget_left=int(total_budget)-int((platform_plan["Copies"]*platform_plan["Purchase Price"]).sum())
+
+    platform_plan["Unpaid Fraction"]=target_copies-platform_plan["Copies"]
+
+    candidates=platform_plan.sort_values(["Unpaid Fraction","Popularity"],ascending=False,kind="stable")
+
+    candidates=candidates[candidates["Unpaid Fraction"]>0]
+
+    extra_copies=[]
+
+    for row_index,price in zip(candidates.index,candidates["Purchase Price"].to_numpy()):
+
+        if price<=budget_left:
+
+            extra_copies.append(row_index)
+
+            budget_left-=price
+
+    platform_plan.loc[extra_copies,"Copies"]+=1
+
+    platform_plan["Cost"]=platform_plan["Copies"]*platform_plan["Purchase Price"]
+
+    return(platform_plan[["Title","Platform","Purchase Price","Target Copies","Copies","Cost"]])
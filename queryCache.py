@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 12:05:10 2026
+
+@author: James
+"""
+import copy
+import threading
+from collections import OrderedDict
+from functools import wraps
+from connectionManager import get_connection,get_database_name
+
+"""
+This module keeps the results of the analytics queries in memory, so asking for the same popularity
+figures again, from the menu or from games_to_buy, does not run the query a second time.
+The results are kept against the query function and the arguments it was called with, and only the
+QUERY_CACHE_SIZE most recently used are kept.
+
+The database counts every change made to the rental, catalogue and genre tables in the 'Data Version' table,
+through triggers, so a write from any connection or thread is seen by the cache. The cache is emptied
+as soon as the version it was filled at is out of date.
+Two database files can easily be at the same data version, so the version is kept together with the path
+of the database file, and switching to another file with set_database_name empties the cache as well.
+"""
+
+QUERY_CACHE_SIZE=64
+
+def get_data_version(connection=None):
+    """
+    This reads the data version of the rental company database, which goes up every time a rental,
+    rental period, game, catalogue entry or genre is added, changed or removed.
+    It takes an optional connection, the calling thread's connection by default, and returns an integer.
+    """
+    connection=connection or get_connection()
+
+    return(connection.execute('SELECT "Version" FROM "Data Version"').fetchone()[0])
+
+def get_cache_version(connection=None):
+    """
+    This returns the version the caches store their results against, a tuple of the path of the database file
+    and its data version, so results read from one database file are never served for another.
+    It takes an optional connection, the calling thread's connection by default.
+    """
+    return((get_database_name(),get_data_version(connection)))
+
+class QueryCache:
+    """
+    Holds the most recently used query results for one data version of the database.
+
+    Results are stored against a key made from the query and its parameters, and the least recently used
+    result is dropped once more than max_size are held. The cache can be shared between threads.
+    chartService.py keeps its rendered charts in one as well.
+    """
+    def __init__(self,max_size=QUERY_CACHE_SIZE):
+
+        self.max_size=max_size
+
+        self.results=OrderedDict()
+
+        self.data_version=None
+
+        self.hits=0
+
+        self.misses=0
+
+        self.lock=threading.Lock()
+
+    def get(self,key,data_version):
+        """
+        This looks up the result stored for a key at a data version.
+        It returns a tuple of a boolean, True if a result was found, and the result.
+        Every result is dropped if the data version has changed since they were stored.
+        """
+        with self.lock:
+
+            if data_version!=self.data_version:
+
+                self.results.clear()
+
+                self.data_version=data_version
+
+            if key in self.results:
+
+                self.results.move_to_end(key)
+
+                self.hits+=1
+
+                return(True,self.results[key])
+
+            self.misses+=1
+
+            return(False,None)
+
+    def put(self,key,data_version,result):
+        """
+        This stores the result of a query read at a data version, dropping the least recently used
+        result if the cache is full. A result read at a version other than the current one is not stored.
+        """
+        with self.lock:
+
+            if data_version!=self.data_version:
+
+                return
+
+            self.results[key]=result
+
+            self.results.move_to_end(key)
+
+            while len(self.results)>self.max_size:
+
+                self.results.popitem(last=False)
+
+    def clear(self):
+        """
+        This drops every stored result.
+        """
+        with self.lock:
+
+            self.results.clear()
+
+            self.data_version=None
+
+query_cache=QueryCache()
+
+def cached_query(query_function):
+    """
+    This wraps a function which reads from the database so its results are served from the query cache
+    while the data version is unchanged. The arguments of the function must be hashable.
+    Each caller is given its own copy of the result, so changing a returned dataframe does not change the cache.
+    Nothing is cached while the calling thread's connection is part way through a transaction,
+    since the writes it can see may still be rolled back.
+    """
+    @wraps(query_function)
+    def cached_query_function(*arguments,**keyword_arguments):
+
+        connection=get_connection()
+
+        if connection.in_transaction:
+
+            return(query_function(*arguments,**keyword_arguments))
+
+        key=(query_function.__qualname__,arguments,tuple(sorted(keyword_arguments.items())))
+
+        data_version=get_cache_version(connection)
+
+        found,result=query_cache.get(key,data_version)
+
+        if found==False:
+
+            result=query_function(*arguments,**keyword_arguments)
+
+            query_cache.put(key,data_version,result)
+
+        return(copy.copy(result))
+
+    return(cached_query_function)
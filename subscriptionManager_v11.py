@@ -0,0 +1,154 @@
+"""
+subscriptionManager.py
+
+This module provides functionalities to manage customer subscriptions for a video game rental system.
+It includes functions to load subscription information from a text file, to check the status of a customer's subscription,
+and to get the rental limit based on the subscription type.
+It also includes a bulk mode which checks the subscriptions of every customer in one vectorized pass,
+used for expiry sweeps and reporting.
+
+Functions:
+    - load_subscriptions(file_name: str) -> dict
+        Load subscription information from a text file into a dictionary.
+
+    - check_subscription(customer_id: str, subscriptions: dict) -> bool
+        Check if a customer's subscription is active based on the current date.
+
+    - get_rental_limit(subscription_type: str) -> int
+        Get the rental limit based on the subscription type.
+
+    - load_subscription_frame(file_name: str) -> pandas.DataFrame
+        Load subscription information from a text file into a dataframe, parsing every date at once.
+
+    - check_subscriptions_in_bulk(subscription_frame: pandas.DataFrame, current_date: datetime) -> pandas.DataFrame
+        Check the subscription status and rental limit of every customer in a dataframe.
+"""
+
+import csv
+from datetime import datetime
+
+
+BASIC_LIMIT = 2
+PREMIUM_LIMIT = 7
+
+RENTAL_LIMITS = {"Basic": BASIC_LIMIT, "Premium": PREMIUM_LIMIT}
+
+def load_subscriptions(file_name='Subscription_Info.txt'):
+    """
+    Load subscription information from a text file into a dictionary.
+
+    Parameters:
+        file_name (str): The name of the text file containing subscription information.
+
+    Returns:
+        dict: A dictionary containing customer IDs as keys and their subscription details as values.
+    """
+    subscriptions = {}
+    with open(file_name, 'r') as file:
+        reader = csv.reader(file)
+        next(reader)
+        for row in reader:
+            customer_id, subscription_type, start_date, end_date = row
+            subscriptions[customer_id] = {
+                'SubscriptionType': subscription_type,
+                'StartDate': datetime.strptime(start_date, '%Y-%m-%d'),
+                'EndDate': datetime.strptime(end_date, '%Y-%m-%d')
+            }
+    return subscriptions
+
+def check_subscription(customer_id, subscriptions):
+    """
+    Check if a customer's subscription is active based on the current date.
+
+    Parameters:
+        customer_id (str): The ID of the customer.
+        subscriptions (dict): A dictionary containing subscription information.
+
+    Returns:
+        bool: True if the subscription is active, False otherwise.
+    """
+    current_date = datetime.now()
+    if customer_id in subscriptions:
+        start_date = subscriptions[customer_id]['StartDate']
+        end_date = subscriptions[customer_id]['EndDate']
+        return start_date <= current_date <= end_date
+    return False
+
+def get_rental_limit(subscription_type):
+    """
+    Get the rental limit based on the subscription type.
+
+    Parameters:
+        subscription_type (str): The type of the subscription ("Basic" or "Premium").
+
+    Returns:
+        int: The rental limit for the given subscription type.
+    """
+    if subscription_type == "Basic":
+        return BASIC_LIMIT
+    elif subscription_type == "Premium":
+        return PREMIUM_LIMIT
+    else:
+        return 0
+
+def load_subscription_frame(file_name='Subscription_Info.txt'):
+    """
+    Load subscription information from a text file into a dataframe.
+    The whole file is read by pandas and each date column is parsed in one vectorized call,
+    instead of one strptime call per row.
+
+    Parameters:
+        file_name (str): The name of the text file containing subscription information.
+
+    Returns:
+        pandas.DataFrame: A dataframe with the columns CustomerID, SubscriptionType, StartDate and EndDate.
+    """
+    import pandas as pd
+
+    subscription_frame = pd.read_csv(file_name, dtype={'CustomerID': str, 'SubscriptionType': str})
+    subscription_frame['StartDate'] = pd.to_datetime(subscription_frame['StartDate'], format='%Y-%m-%d')
+    subscription_frame['EndDate'] = pd.to_datetime(subscription_frame['EndDate'], format='%Y-%m-%d')
+    return subscription_frame
+
+def subscriptions_to_frame(subscriptions):
+    """
+    Convert a subscription dictionary, as returned by load_subscriptions, into a dataframe.
+
+    Parameters:
+        subscriptions (dict): A dictionary containing subscription information.
+
+    Returns:
+        pandas.DataFrame: A dataframe with the columns CustomerID, SubscriptionType, StartDate and EndDate.
+    """
+    import pandas as pd
+
+    subscription_frame = pd.DataFrame.from_dict(subscriptions, orient='index',
+                                                columns=['SubscriptionType', 'StartDate', 'EndDate'])
+    subscription_frame.index.name = 'CustomerID'
+    return subscription_frame.reset_index()
+
+def check_subscriptions_in_bulk(subscription_frame, current_date=None):
+    """
+    Check the subscription status and rental limit of every customer in one vectorized pass.
+    A subscription is active under the same rule as check_subscription, and the rental limits
+    match get_rental_limit, with 0 for an unknown subscription type.
+
+    Parameters:
+        subscription_frame (pandas.DataFrame): Subscriptions as returned by load_subscription_frame,
+            or a subscription dictionary as returned by load_subscriptions.
+        current_date (datetime): The date to check the subscriptions on, the current date if not given.
+
+    Returns:
+        pandas.DataFrame: A copy of the subscriptions with the added columns Active, a boolean which is
+            True if the subscription is active, Expired, a boolean which is True if the subscription
+            has ended, and RentalLimit, the number of games the customer may rent.
+    """
+    if isinstance(subscription_frame, dict):
+        subscription_frame = subscriptions_to_frame(subscription_frame)
+    if current_date is None:
+        current_date = datetime.now()
+    checked_frame = subscription_frame.copy()
+    checked_frame['Active'] = (checked_frame['StartDate'] <= current_date) & (current_date <= checked_frame['EndDate'])
+    checked_frame['Expired'] = checked_frame['EndDate'] < current_date
+    checked_frame['RentalLimit'] = checked_frame['SubscriptionType'].map(RENTAL_LIMITS).fillna(0).astype(int)
+    return checked_frame
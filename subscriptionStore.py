@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:41:09 2026
+
+@author: James
+"""
+import csv
+import os
+import threading
+from datetime import datetime
+from connectionManager import get_connection,get_database_name,run_in_transaction
+from subscriptionManager_v11 import load_subscriptions
+
+"""
+This module keeps the customer subscriptions in memory so that a rental does not re-read the subscription file.
+The file is parsed once, into the same dictionary load_subscriptions returns, and is only read again when
+its modification time or size changes. When rows have only been appended to the file, just the new rows are parsed.
+Every change is also copied into the 'Subscriptions' table of the rental company database,
+so the subscriptions can be queried alongside the rental records. A store is kept for each database file
+and subscription file, so the table of a database switched to with set_database_name is filled too.
+"""
+
+SUBSCRIPTION_FILE_NAME="Customer Subscription Data.txt"
+
+#The last bytes read are compared to tell whether the file was appended to or rewritten.
+APPEND_CHECK_BYTES=256
+
+class SubscriptionStore:
+    """
+    Holds the parsed subscriptions of one subscription file.
+
+    The subscriptions are reloaded whenever the file changes on disk. A file which has only grown
+    has its new rows parsed and added, any other change reloads the whole file.
+    The store can be shared between threads.
+    """
+    def __init__(self,file_name):
+
+        self.file_name=file_name
+
+        self.subscriptions={}
+
+        self.file_signature=None
+
+        self.file_end=b""
+
+        self.lock=threading.Lock()
+
+    def get_subscriptions(self):
+        """
+        This returns the dictionary of subscriptions, keyed on customer id, reloading the file first if it has changed.
+        The dictionary must not be modified by the caller.
+        """
+        file_status=os.stat(self.file_name)
+
+        file_signature=(file_status.st_mtime_ns,file_status.st_size)
+
+        if file_signature!=self.file_signature:
+
+            with self.lock:
+
+                if file_signature!=self.file_signature:
+
+                    self.reload(file_signature)
+
+        return(self.subscriptions)
+
+    def reload(self,file_signature):
+        """
+        This brings the subscriptions up to date with the file and copies the changes into the database.
+        Only rows appended since the last load are parsed if the rest of the file is unchanged.
+        """
+        first_load=self.file_signature is None
+
+        with open(self.file_name,"rb") as file_data:
+
+            if first_load==False and self.was_appended_to(file_data,file_signature):
+
+                changed_subscriptions=parse_subscription_rows(file_data.read().decode().splitlines())
+
+                subscriptions={**self.subscriptions,**changed_subscriptions}
+
+                removed_customers=[]
+
+            else:
+
+                subscriptions=load_subscriptions(self.file_name)
+
+                changed_subscriptions={customer_id:subscription for customer_id,subscription in subscriptions.items()
+                                       if self.subscriptions.get(customer_id)!=subscription}
+
+                removed_customers=[customer_id for customer_id in self.subscriptions if customer_id not in subscriptions]
+
+            file_data.seek(max(0,file_signature[1]-APPEND_CHECK_BYTES))
+
+            self.file_end=file_data.read(APPEND_CHECK_BYTES)
+
+        store_subscriptions_in_database(changed_subscriptions,None if first_load else removed_customers)
+
+        self.subscriptions=subscriptions
+
+        self.file_signature=file_signature
+
+    def was_appended_to(self,file_data,file_signature):
+        """
+        This checks whether the file has only had rows added to its end since it was last loaded,
+        by comparing the bytes that used to end the file. If it has, the open file is left positioned
+        at the first new byte. It returns a boolean expression, True if only the new rows need parsing.
+        """
+        previous_size=self.file_signature[1]
+
+        if file_signature[1]<=previous_size or not self.file_end.endswith(b"\n"):
+
+            return(False)
+
+        file_data.seek(previous_size-len(self.file_end))
+
+        return(file_data.read(len(self.file_end))==self.file_end)
+
+def parse_subscription_rows(rows):
+    """
+    This parses lines of the subscription file in the same way as load_subscriptions.
+    It takes a list of lines without the header and returns a dictionary keyed on customer id.
+    """
+    subscriptions={}
+
+    for row in csv.reader(rows):
+
+        if not row:
+
+            continue
+
+        customer_id,subscription_type,start_date,end_date=row
+
+        subscriptions[customer_id]={"SubscriptionType":subscription_type,
+                                    "StartDate":datetime.strptime(start_date,"%Y-%m-%d"),
+                                    "EndDate":datetime.strptime(end_date,"%Y-%m-%d")}
+
+    return(subscriptions)
+
+def store_subscriptions_in_database(changed_subscriptions,removed_customers):
+    """
+    This copies changed subscriptions into the 'Subscriptions' table in one transaction, through run_in_transaction.
+    It takes a dictionary of the new or changed subscriptions and a list of the customer ids no longer
+    in the file. If the list is None the table is being filled for the first time, so every other row is removed.
+    """
+    rows=[(customer_id,subscription["SubscriptionType"],subscription["StartDate"].strftime("%Y-%m-%d"),
+           subscription["EndDate"].strftime("%Y-%m-%d")) for customer_id,subscription in changed_subscriptions.items()]
+
+    run_in_transaction(store_subscriptions_transaction,rows,removed_customers)
+
+def store_subscriptions_transaction(rows,removed_customers):
+    """
+    This writes subscription rows to the 'Subscriptions' table for store_subscriptions_in_database.
+    It is run inside run_in_transaction, so the rows removed and written are committed together.
+    """
+    connection=get_connection()
+
+    if removed_customers is None:
+
+        connection.execute('DELETE FROM "Subscriptions"')
+
+    else:
+
+        connection.executemany('DELETE FROM "Subscriptions" WHERE "Customer Id" = ?',((customer_id,) for customer_id in removed_customers))
+
+    connection.executemany("""INSERT OR REPLACE INTO "Subscriptions"
+                              ("Customer Id","Subscription Type","Start Date","End Date") VALUES (?,?,?,?)""",rows)
+
+_subscription_stores={}
+
+_subscription_stores_lock=threading.Lock()
+
+def get_subscription_store(file_name=SUBSCRIPTION_FILE_NAME):
+    """
+    This returns the shared store for a subscription file and the current database file,
+    creating it the first time it is asked for.
+    """
+    store_key=(get_database_name(),os.path.abspath(file_name))
+
+    with _subscription_stores_lock:
+
+        if store_key not in _subscription_stores:
+
+            _subscription_stores[store_key]=SubscriptionStore(store_key[1])
+
+        return(_subscription_stores[store_key])
+
+def get_subscriptions(file_name=SUBSCRIPTION_FILE_NAME):
+    """
+    This returns the up to date subscription dictionary of a subscription file.
+    It takes the file name as input and returns the same dictionary load_subscriptions would,
+    without reading the file unless it has changed since it was last loaded.
+    """
+    return(get_subscription_store(file_name).get_subscriptions())
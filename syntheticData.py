@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 12:17:23 2026
+
+@author: James
+"""
+import itertools
+import os
+import random
+from datetime import date,timedelta
+
+"""
+This module writes synthetic versions of the three text files the rental company software reads,
+the games file, the rental file and the subscription file, at any size, for benchmark.py.
+The files are written in the same formats as the sample files, tab separated with day/month/year dates
+for the games and rentals and comma separated with year-month-day dates for the subscriptions,
+with windows line endings. Every line is written as it is generated, so memory use does not grow with the files.
+
+The data is made to look like a real rental business:
+   - the popularity of the titles follows a Zipf distribution, so a few titles take most of the rentals,
+     and popular titles are stocked with more copies,
+   - the rentals run in date order up to the reference date, those not yet due back are left open,
+   - a small share of the rental lines are duplicated, missing their customer id or written with
+     the year in the middle of the date, so the cleaning done by database.py has some work to do,
+   - most subscriptions are active today and the rest have expired. They are generated around today rather
+     than the reference date, since the rental functions check a subscription against today's date.
+The same seed, reference date and day of the run always give the same files.
+
+database.py only keeps rentals whose customer id is four characters long. The first 9000 customers
+are numbered 1000 to 9999 like the sample data, and any more are given four character ids starting
+with a letter, which allows for over a million customers.
+"""
+
+PLATFORMS=("PC","Xbox","Nintendo Switch","PlayStation")
+
+GENRES=("Action","Adventure","RPG","Simulation","Sports")
+
+TITLE_ADJECTIVES=("Crimson","Silent","Eternal","Hidden","Iron","Lost","Neon","Savage","Golden","Frozen",
+                  "Shattered","Wild","Ancient","Cosmic","Broken","Endless","Hollow","Radiant","Rogue","Stellar")
+
+TITLE_NOUNS=("Legends","Kingdom","Horizon","Odyssey","Frontier","Dynasty","Empire","Chronicles","Warriors","League",
+             "Quest","Galaxy","Citadel","Outlaws","Racers","Islands","Tactics","Realms","Titans","Voyage")
+
+GAME_FILE_HEADER="ID\tTitle\tPlatform\tGenre\tPurchase Price\tPurchase Date"
+
+RENTAL_FILE_HEADER="Game Id\tRental Start Date\tRental End Date\tCustomer Id"
+
+SUBSCRIPTION_FILE_HEADER="CustomerID,SubscriptionType,StartDate,EndDate"
+
+RENTAL_DATE_FORMAT="%d/%m/%Y"
+
+#A small share of the rental dates are written with the year in the middle, which database.py has to
+#read and rewrite. It is the first format of dateNormalizer.py with that shape, so the dates are read correctly.
+OTHER_RENTAL_DATE_FORMAT="%d/%Y/%m"
+
+SUBSCRIPTION_DATE_FORMAT="%Y-%m-%d"
+
+LETTERS="ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+DIGITS_AND_LETTERS="0123456789"+LETTERS
+
+NUMERIC_CUSTOMERS=9000
+
+class SyntheticDataSettings:
+    """
+    Holds the size and shape of a synthetic data set.
+
+    titles, customers and rentals set the size of the files, the other settings the shape of the data.
+    """
+    def __init__(self,titles=100,customers=1000,rentals=10000,seed=2023,reference_date=None,
+                 copies_per_platform=2,popularity_skew=1.1,rental_days=730,longest_rental=14,
+                 other_date_format_share=0.01,duplicate_share=0.002,missing_customer_share=0.001,
+                 expired_subscription_share=0.15):
+
+        self.titles=titles
+
+        self.customers=customers
+
+        self.rentals=rentals
+
+        self.seed=seed
+
+        self.reference_date=reference_date or date.today()
+
+        self.copies_per_platform=copies_per_platform
+
+        self.popularity_skew=popularity_skew
+
+        self.rental_days=rental_days
+
+        self.longest_rental=longest_rental
+
+        self.other_date_format_share=other_date_format_share
+
+        self.duplicate_share=duplicate_share
+
+        self.missing_customer_share=missing_customer_share
+
+        self.expired_subscription_share=expired_subscription_share
+
+    def as_dict(self):
+        """
+        This returns the settings as a dictionary, for the benchmark results.
+        """
+        settings=dict(vars(self))
+
+        settings["reference_date"]=self.reference_date.isoformat()
+
+        return(settings)
+
+def title_name(title_number):
+    """
+    This makes up the name of a title from its number. Every number gives a different name.
+    """
+    adjective=TITLE_ADJECTIVES[title_number%len(TITLE_ADJECTIVES)]
+
+    noun=TITLE_NOUNS[(title_number//len(TITLE_ADJECTIVES))%len(TITLE_NOUNS)]
+
+    sequel=title_number//(len(TITLE_ADJECTIVES)*len(TITLE_NOUNS))+1
+
+    return(f"{adjective} {noun}" if sequel==1 else f"{adjective} {noun} {sequel}")
+
+def customer_id(customer_number):
+    """
+    This makes up the four character id of a customer from its number, starting from 0.
+    """
+    if customer_number<NUMERIC_CUSTOMERS:
+
+        return(str(1000+customer_number))
+
+    customer_number-=NUMERIC_CUSTOMERS
+
+    characters=[LETTERS[(customer_number//len(DIGITS_AND_LETTERS)**3)%len(LETTERS)]]
+
+    for power in (2,1,0):
+
+        characters.append(DIGITS_AND_LETTERS[(customer_number//len(DIGITS_AND_LETTERS)**power)%len(DIGITS_AND_LETTERS)])
+
+    return("".join(characters))
+
+def title_popularity(settings):
+    """
+    This works out the cumulative popularity weights of the titles, the most popular title first,
+    following a Zipf distribution with the skew of the settings.
+    """
+    return(list(itertools.accumulate(1/(rank**settings.popularity_skew) for rank in range(1,settings.titles+1))))
+
+def write_game_file(file_name,settings,random_numbers):
+    """
+    This writes the games file and returns the game ids of every title, as a list of lists in title order.
+    Each title is sold on one to four platforms and stocked with more copies the more popular it is.
+    """
+    game_ids_by_title=[]
+
+    next_game_id=1
+
+    purchase_start=settings.reference_date-timedelta(days=settings.rental_days+3*365)
+
+    with open(file_name,"w",newline="\r\n") as game_file:
+
+        game_file.write(GAME_FILE_HEADER+"\n")
+
+        for title_number in range(settings.titles):
+
+            title=title_name(title_number)
+
+            genre=GENRES[random_numbers.randrange(len(GENRES))]
+
+            platforms=random_numbers.sample(PLATFORMS,random_numbers.randint(1,len(PLATFORMS)))
+
+            #The most popular titles are stocked with up to five times as many copies.
+            copies=max(1,round(settings.copies_per_platform*(1+4/(title_number+1))))
+
+            game_ids=[]
+
+            for platform in platforms:
+
+                purchase_price=random_numbers.randint(20,70)
+
+                for copy_number in range(random_numbers.randint(1,copies)):
+
+                    purchase_date=purchase_start+timedelta(days=random_numbers.randrange(3*365))
+
+                    game_file.write(f"{next_game_id}\t{title}\t{platform}\t{genre}\t{purchase_price}\t{purchase_date.strftime(RENTAL_DATE_FORMAT)}\n")
+
+                    game_ids.append(next_game_id)
+
+                    next_game_id+=1
+
+            game_ids_by_title.append(game_ids)
+
+    return(game_ids_by_title)
+
+def write_rental_file(file_name,settings,random_numbers,game_ids_by_title):
+    """
+    This writes the rental file, with the rentals in date order ending on the reference date.
+    Rentals which would be returned after the reference date are left open.
+    It returns the number of lines written, not counting the header.
+    """
+    cumulative_popularity=title_popularity(settings)
+
+    first_day=settings.reference_date-timedelta(days=settings.rental_days)
+
+    days=[first_day+timedelta(days=day) for day in range(settings.rental_days+settings.longest_rental+1)]
+
+    dates=[day.strftime(RENTAL_DATE_FORMAT) for day in days]
+
+    other_dates=[day.strftime(OTHER_RENTAL_DATE_FORMAT) for day in days]
+
+    customer_ids=[customer_id(customer_number) for customer_number in range(min(settings.customers,200000))]
+
+    lines_written=0
+
+    previous_line=None
+
+    with open(file_name,"w",newline="\r\n") as rental_file:
+
+        rental_file.write(RENTAL_FILE_HEADER+"\n")
+
+        for rental_number in range(settings.rentals):
+
+            if previous_line is not None and random_numbers.random()<settings.duplicate_share:
+
+                rental_file.write(previous_line)
+
+                lines_written+=1
+
+                continue
+
+            title_number=random_numbers.choices(range(settings.titles),cum_weights=cumulative_popularity)[0]
+
+            game_ids=game_ids_by_title[title_number]
+
+            game_id=game_ids[random_numbers.randrange(len(game_ids))]
+
+            start_day=rental_number*settings.rental_days//settings.rentals
+
+            end_day=start_day+random_numbers.randint(1,settings.longest_rental)
+
+            rental_dates=other_dates if random_numbers.random()<settings.other_date_format_share else dates
+
+            start_date=rental_dates[start_day]
+
+            end_date=rental_dates[end_day] if end_day<=settings.rental_days else ""
+
+            customer_number=random_numbers.randrange(settings.customers)
+
+            if customer_number<len(customer_ids):
+
+                customer=customer_ids[customer_number]
+
+            else:
+
+                customer=customer_id(customer_number)
+
+            if random_numbers.random()<settings.missing_customer_share:
+
+                customer=""
+
+            previous_line=f"{game_id}\t{start_date}\t{end_date}\t{customer}\n"
+
+            rental_file.write(previous_line)
+
+            lines_written+=1
+
+    return(lines_written)
+
+def write_subscription_file(file_name,settings,random_numbers):
+    """
+    This writes the subscription file, with one subscription for every customer.
+    The subscriptions start and end around today, whatever the reference date of the rentals,
+    as can_customer_rent_another_game checks them against today's date.
+    """
+    today=date.today()
+
+    with open(file_name,"w",newline="\r\n") as subscription_file:
+
+        subscription_file.write(SUBSCRIPTION_FILE_HEADER+"\n")
+
+        for customer_number in range(settings.customers):
+
+            subscription_type="Premium" if random_numbers.random()<0.4 else "Basic"
+
+            if random_numbers.random()<settings.expired_subscription_share:
+
+                end_date=today-timedelta(days=random_numbers.randint(1,365))
+
+            else:
+
+                end_date=today+timedelta(days=random_numbers.randint(1,365))
+
+            start_date=end_date-timedelta(days=random_numbers.randint(180,720))
+
+            subscription_file.write(f"{customer_id(customer_number)},{subscription_type},"
+                                    f"{start_date.strftime(SUBSCRIPTION_DATE_FORMAT)},{end_date.strftime(SUBSCRIPTION_DATE_FORMAT)}\n")
+
+def generate_files(directory,settings=None,game_file_name="Business Games_data.txt",
+                   rental_file_name="Customer Rental Data.txt",subscription_file_name="Customer Subscription Data.txt"):
+    """
+    This writes the three synthetic text files into a directory, which is created if needed.
+    It takes the directory, the SyntheticDataSettings and optionally the names of the files,
+    which default to the names the rental company software reads.
+    It returns a dictionary of the file paths, the game ids of every title in popularity order,
+    and the names of the titles.
+    """
+    settings=settings or SyntheticDataSettings()
+
+    if settings.customers>NUMERIC_CUSTOMERS+len(LETTERS)*len(DIGITS_AND_LETTERS)**3:
+
+        raise ValueError(f"Only {NUMERIC_CUSTOMERS+len(LETTERS)*len(DIGITS_AND_LETTERS)**3} customers can have four character ids")
+
+    os.makedirs(directory,exist_ok=True)
+
+    random_numbers=random.Random(settings.seed)
+
+    files={
+        "games":os.path.join(directory,game_file_name),
+        "rentals":os.path.join(directory,rental_file_name),
+        "subscriptions":os.path.join(directory,subscription_file_name),
+    }
+
+    game_ids_by_title=write_game_file(files["games"],settings,random_numbers)
+
+    write_rental_file(files["rentals"],settings,random_numbers,game_ids_by_title)
+
+    write_subscription_file(files["subscriptions"],settings,random_numbers)
+
+    return({"files":files,"game_ids_by_title":game_ids_by_title,
+            "titles":[title_name(title_number) for title_number in range(settings.titles)]})